@@ -0,0 +1,357 @@
+"""
+Input backends: where clicks are injected and where key/mouse events come from.
+
+Everything outside this module speaks bind tokens: keys are 'f6', 'a',
+'alt', 'alt_r', ...; mouse buttons are 'left', 'right', 'middle', 'mouse4' and
+'mouse5'. A backend translates between tokens and its native events.
+"""
+import os
+import sys
+import threading
+import time
+from array import array
+
+MOUSE_BUTTONS = ('left', 'right', 'middle', 'mouse4', 'mouse5')
+BUTTON_IDS = {b: i for i, b in enumerate(MOUSE_BUTTONS)}
+
+# pynput Button members per token, first match wins: side buttons are x1/x2 on
+# Windows and button8/button9 on Xorg; macOS has none, so there they are
+# simply unavailable
+PYNPUT_BUTTONS = {
+    'left': ('left',),
+    'right': ('right',),
+    'middle': ('middle',),
+    'mouse4': ('x1', 'button8'),
+    'mouse5': ('x2', 'button9'),
+}
+
+# pynput's Key.alt_l/ctrl_l/shift_l are aliases of Key.alt/ctrl/shift on X11,
+# uinput and macOS but separate keys on Windows; both spellings become one token
+KEY_ALIASES = {'alt_l': 'alt', 'ctrl_l': 'ctrl', 'shift_l': 'shift'}
+
+# Kinds of non-click events recorded by FakeBackend
+EVENT_KEY_DOWN, EVENT_KEY_UP, EVENT_BUTTON_DOWN, EVENT_BUTTON_UP, EVENT_MOVE, EVENT_SCROLL = range(6)
+
+class InputBackend:
+    """Interface every backend implements."""
+
+    def click(self, button, count):
+        """Inject 'count' clicks of the mouse 'button' token."""
+        raise NotImplementedError
+
+    def click_at(self, x, y, button, count):
+        """Move the pointer to (x, y) and click there."""
+        self.move(x, y)
+        self.click(button, count)
+
+    def press_key(self, token):
+        raise NotImplementedError
+
+    def release_key(self, token):
+        raise NotImplementedError
+
+    def press_button(self, button):
+        raise NotImplementedError
+
+    def release_button(self, button):
+        raise NotImplementedError
+
+    def move(self, x, y):
+        """Move the pointer to absolute screen coordinates."""
+        raise NotImplementedError
+
+    def scroll(self, dx, dy):
+        raise NotImplementedError
+
+    def start_listening(self, on_press, on_release, on_click):
+        """
+        Deliver global events until the process exits: on_press(token),
+        on_release(token) and on_click(x, y, token, pressed). Returns the
+        thread the events are delivered from.
+        """
+        raise NotImplementedError
+
+    def listen_motion(self, on_move, on_scroll):
+        """
+        Deliver pointer motion, on_move(x, y), and wheel events,
+        on_scroll(x, y, dx, dy), until the returned stop callable is called.
+        Kept separate from start_listening() so high-rate motion events are
+        only hooked while something (the macro recorder) needs them.
+        """
+        raise NotImplementedError
+
+class Win32Injector:
+    """
+    Clicks through one SendInput() call per click() on Windows: all the
+    press/release events of a double, triple or batched click go to the OS
+    as a single submission instead of one call per event. The INPUT arrays
+    are built once per (button, count) and reused.
+    """
+    # MOUSEEVENTF_* down/up flags and mouseData per button token
+    FLAGS = {
+        'left': (0x0002, 0x0004, 0),
+        'right': (0x0008, 0x0010, 0),
+        'middle': (0x0020, 0x0040, 0),
+        'mouse4': (0x0080, 0x0100, 1),   # XDOWN/XUP, XBUTTON1
+        'mouse5': (0x0080, 0x0100, 2),   # XDOWN/XUP, XBUTTON2
+    }
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [('dx', wintypes.LONG), ('dy', wintypes.LONG), ('mouseData', wintypes.DWORD),
+                        ('dwFlags', wintypes.DWORD), ('time', wintypes.DWORD),
+                        ('dwExtraInfo', ctypes.c_size_t)]
+
+        class INPUT(ctypes.Structure):
+            # MOUSEINPUT is the largest member of the INPUT union
+            _fields_ = [('type', wintypes.DWORD), ('mi', MOUSEINPUT)]
+
+        self._INPUT = INPUT
+        self._size = ctypes.sizeof(INPUT)
+        self._send = ctypes.windll.user32.SendInput
+        self._send.argtypes = (wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+        self._send.restype = wintypes.UINT
+        self._batches = {}
+
+    def _batch(self, button, count):
+        down, up, data = self.FLAGS[button]
+        events = (self._INPUT * (2 * count))()
+        for i in range(2 * count):
+            events[i].type = 0  # INPUT_MOUSE
+            events[i].mi.dwFlags = up if i & 1 else down
+            events[i].mi.mouseData = data
+        batch = self._batches[(button, count)] = (2 * count, events)
+        return batch
+
+    def click(self, button, count):
+        batch = self._batches.get((button, count)) or self._batch(button, count)
+        self._send(batch[0], batch[1], self._size)
+
+class PynputBackend(InputBackend):
+    """The real thing: injection and global hooks through pynput."""
+
+    def __init__(self):
+        # Imported here so the fake backend never needs pynput (or a display)
+        from pynput import keyboard, mouse
+        self._keyboard = keyboard
+        self._mouse = mouse
+        self._controller = mouse.Controller()
+        self._key_controller = keyboard.Controller()
+        self._injector = Win32Injector() if sys.platform == 'win32' else None
+        members = mouse.Button.__members__
+        self.button_map = {}
+        for token, names in PYNPUT_BUTTONS.items():
+            native = next((members[n] for n in names if n in members), None)
+            if native is not None:
+                self.button_map[token] = native
+        self.button_tokens = {v: k for k, v in self.button_map.items()}
+        self.key_tokens = {k: KEY_ALIASES.get(k.name, k.name) for k in keyboard.Key}
+
+    def key_token(self, key):
+        """Normalize a pynput Key/KeyCode to a bind token (None if it has no name)."""
+        token = self.key_tokens.get(key)
+        if token is None and isinstance(key, self._keyboard.KeyCode) and key.char:
+            token = key.char.lower()
+        return token
+
+    def native_key(self, token):
+        """Inverse of key_token(): a pynput Key for named keys, else a KeyCode."""
+        Key = self._keyboard.Key
+        if token in Key.__members__:
+            return Key[token]
+        return self._keyboard.KeyCode.from_char(token)
+
+    def click(self, button, count):
+        if self._injector is not None:
+            self._injector.click(button, count)
+        else:
+            native = self.button_map.get(button)
+            if native is not None:  # no such button on this platform
+                self._controller.click(native, count)
+
+    def press_key(self, token):
+        self._key_controller.press(self.native_key(token))
+
+    def release_key(self, token):
+        self._key_controller.release(self.native_key(token))
+
+    def native_button(self, button):
+        native = self.button_map.get(button)
+        if native is None:
+            raise ValueError(f"no {button!r} button on this platform")
+        return native
+
+    def press_button(self, button):
+        self._controller.press(self.native_button(button))
+
+    def release_button(self, button):
+        self._controller.release(self.native_button(button))
+
+    def move(self, x, y):
+        self._controller.position = (x, y)
+
+    def scroll(self, dx, dy):
+        self._controller.scroll(dx, dy)
+
+    def listen_motion(self, on_move, on_scroll):
+        listener = self._mouse.Listener(on_move=on_move, on_scroll=on_scroll)
+        listener.start()
+        return listener.stop
+
+    def start_listening(self, on_press, on_release, on_click):
+        key_token = self.key_token
+        button_tokens = self.button_tokens
+
+        def listener_thread():
+            with self._keyboard.Listener(on_press=lambda k: on_press(key_token(k)),
+                                         on_release=lambda k: on_release(key_token(k))) as kl, \
+                 self._mouse.Listener(on_click=lambda x, y, b, p: on_click(x, y, button_tokens.get(b), p)) as ml:
+                kl.join()
+                ml.join()
+
+        t_listener = threading.Thread(target=listener_thread, daemon=True)
+        t_listener.start()
+        return t_listener
+
+class FakeBackend(InputBackend):
+    """
+    In-memory backend for tests and benchmarks; needs no display.
+
+    Every injected click is timestamped (perf_counter_ns) into preallocated
+    arrays, so recording costs a few array stores and no allocation; other
+    injected events (keys, buttons, moves, scrolls) go to a second set of
+    arrays. Incoming key and mouse events are fed in with press(), release(),
+    button(), feed_move() and feed_scroll(), or replayed from a script with
+    replay().
+    """
+
+    def __init__(self, capacity=1_000_000):
+        self.capacity = capacity
+        self.times = array('q', bytes(8 * capacity))
+        self.buttons = array('b', bytes(capacity))
+        self.counts = array('H', bytes(2 * capacity))
+        self.n = 0          # clicks recorded (stops growing once the buffer is full)
+        self.dropped = 0
+        self.event_times = array('q', bytes(8 * capacity))
+        self.event_kinds = array('b', bytes(capacity))
+        self.events = 0
+        self._handlers = None
+        self._motion = None
+        self._stopped = threading.Event()
+
+    def click(self, button, count):
+        n = self.n
+        if n < self.capacity:
+            self.times[n] = time.perf_counter_ns()
+            self.buttons[n] = BUTTON_IDS[button]
+            self.counts[n] = count
+            self.n = n + 1
+        else:
+            self.dropped += 1
+
+    def _event(self, kind):
+        n = self.events
+        if n < self.capacity:
+            self.event_times[n] = time.perf_counter_ns()
+            self.event_kinds[n] = kind
+            self.events = n + 1
+
+    def press_key(self, token):
+        self._event(EVENT_KEY_DOWN)
+
+    def release_key(self, token):
+        self._event(EVENT_KEY_UP)
+
+    def press_button(self, button):
+        self._event(EVENT_BUTTON_DOWN)
+
+    def release_button(self, button):
+        self._event(EVENT_BUTTON_UP)
+
+    def move(self, x, y):
+        self._event(EVENT_MOVE)
+
+    def scroll(self, dx, dy):
+        self._event(EVENT_SCROLL)
+
+    def reset(self):
+        self.n = 0
+        self.dropped = 0
+        self.events = 0
+
+    def clicks(self):
+        """Timestamps (ns) of the recorded clicks."""
+        return self.times[:self.n]
+
+    def start_listening(self, on_press, on_release, on_click):
+        self._handlers = (on_press, on_release, on_click)
+        t_listener = threading.Thread(target=self._stopped.wait, daemon=True)
+        t_listener.start()
+        return t_listener
+
+    def stop_listening(self):
+        self._stopped.set()
+
+    def listen_motion(self, on_move, on_scroll):
+        self._motion = (on_move, on_scroll)
+        def stop():
+            self._motion = None
+        return stop
+
+    def feed_move(self, x, y):
+        if self._motion is not None:
+            self._motion[0](x, y)
+
+    def feed_scroll(self, dx, dy, x=0, y=0):
+        if self._motion is not None:
+            self._motion[1](x, y, dx, dy)
+
+    def press(self, token):
+        self._handlers[0](KEY_ALIASES.get(token, token))
+
+    def release(self, token):
+        self._handlers[1](KEY_ALIASES.get(token, token))
+
+    def button(self, token, pressed, x=0, y=0):
+        self._handlers[2](x, y, token, pressed)
+
+    def replay(self, script):
+        """
+        Feed scripted events on their own thread: 'script' is a sequence of
+        (offset_seconds, token, pressed); mouse button tokens go to on_click.
+        Returns the thread.
+        """
+        def run():
+            start = time.perf_counter()
+            for offset, token, pressed in script:
+                deadline = start + offset
+                remaining = deadline - time.perf_counter()
+                if remaining > 0.002:
+                    time.sleep(remaining - 0.002)
+                while time.perf_counter() < deadline:
+                    time.sleep(0)
+                if token in BUTTON_IDS:
+                    self.button(token, pressed)
+                elif pressed:
+                    self.press(token)
+                else:
+                    self.release(token)
+
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        return t
+
+BACKENDS = {
+    'pynput': PynputBackend,
+    'fake': FakeBackend,
+}
+
+def create_backend(name=None):
+    """Instantiate the backend called 'name' (default: $AUTOCLICKER_BACKEND or 'pynput')."""
+    name = name or os.environ.get('AUTOCLICKER_BACKEND', 'pynput')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
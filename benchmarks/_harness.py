@@ -0,0 +1,43 @@
+"""
+Setup shared by the benchmarks and tests/test_stop_latency.py: load the app
+core against the fake input backend and a throwaway config dir, and pick
+percentiles out of the measurements.
+"""
+import os
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if sys.path[0] != REPO_DIR:
+    sys.path.insert(0, REPO_DIR)     # ahead of benchmarks/, whose control.py shadows the app's
+
+import clicktrace
+
+percentile = clicktrace.percentile
+
+def fake_environment(config_dir):
+    """Environment variables that point the app at the fake backend and 'config_dir'."""
+    return {'AUTOCLICKER_BACKEND': 'fake', 'XDG_CONFIG_HOME': config_dir, 'APPDATA': config_dir}
+
+def import_clicker(listen=False, batched=True):
+    """
+    Import the app core, which reads the environment set up by the caller.
+    'listen' starts the (fake) hooks; 'batched=False' turns batched mode off
+    so every click is its own tick.
+    """
+    import clicker
+    if not batched:
+        clicker.config['engine']['batch_cps'] = 0
+    if listen:
+        clicker.start_listeners()
+    return clicker
+
+def load_clicker(listen=False, batched=True):
+    """import_clicker() against the fake backend and a throwaway config dir."""
+    os.environ.update(fake_environment(tempfile.mkdtemp(prefix='autoclicker-bench-')))
+    return import_clicker(listen, batched)
+
+def summary(values):
+    """p50, p99 and max of 'values', in their own unit, keyed for a JSON report."""
+    values = sorted(values)
+    return {'p50_us': percentile(values, 0.50), 'p99_us': percentile(values, 0.99), 'max_us': values[-1]}
@@ -0,0 +1,83 @@
+"""
+Control API benchmark: round-trip time of single and batched commands, and
+the latency from sending "start" to the first injected click, through the
+real control server and the fake input backend.
+
+    python benchmarks/control.py [--runs 200] [--transport tcp|unix]
+
+Prints one JSON object with latency percentiles in microseconds.
+"""
+import argparse
+import json
+import socket
+import time
+
+from _harness import load_clicker, summary
+
+def configure(clicker, transport):
+    if transport == 'unix':
+        clicker.config['control'].update({'socket': 'control.sock', 'port': 0})
+    else:
+        clicker.config['control'].update({'socket': None, 'port': 0})
+    return clicker
+
+def connect(server):
+    if isinstance(server.address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.connect(server.address)
+    return sock, sock.makefile('rb')
+
+def request(sock, reader, payload):
+    sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+    return json.loads(reader.readline())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--transport', choices=['tcp', 'unix'], default='tcp')
+    parser.add_argument('--batch', type=int, default=10, help="commands per batched request")
+    args = parser.parse_args()
+
+    clicker = configure(load_clicker(), args.transport)
+    if args.transport == 'tcp':
+        # Port 0 disables the server in config; bind an ephemeral port directly
+        from control import ControlServer
+        server = ControlServer(clicker.CONTROL_COMMANDS, port=0)
+    else:
+        server = clicker.start_control_server()
+    sock, reader = connect(server)
+    backend = clicker.backend
+
+    single, batched, first_click = [], [], []
+    set_cmd = {'cmd': 'set', 'channel': 'left_click', 'cps': 100}
+    for _ in range(args.runs):
+        t0 = time.perf_counter_ns()
+        request(sock, reader, set_cmd)
+        single.append((time.perf_counter_ns() - t0) / 1e3)
+
+        t0 = time.perf_counter_ns()
+        request(sock, reader, [set_cmd] * args.batch)
+        batched.append((time.perf_counter_ns() - t0) / 1e3)
+
+        backend.reset()
+        t0 = time.perf_counter_ns()
+        request(sock, reader, {'cmd': 'start', 'channel': 'left_click'})
+        while not backend.n:
+            time.sleep(0)
+        first_click.append((backend.times[0] - t0) / 1e3)
+        request(sock, reader, {'cmd': 'stop', 'channel': 'left_click'})
+
+    sock.close()
+    server.close()
+    print(json.dumps({
+        'transport': args.transport,
+        'round_trip': summary(single),
+        f'round_trip_batch_{args.batch}': summary(batched),
+        'start_to_first_click': summary(first_click),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
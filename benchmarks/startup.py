@@ -0,0 +1,85 @@
+"""
+Startup benchmark: import time, time to first click and peak RSS of the
+headless entry point versus the GUI, each measured in a fresh interpreter.
+
+    python benchmarks/startup.py [--runs 5] [--modes headless gui] [--backend fake]
+
+Prints one JSON object with the median of every metric per mode.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child. The bench channel records the wall-clock time of the
+# first injected click, so it can be compared with the parent's spawn time.
+CHILD = r'''
+import json, sys, threading, time
+t0 = time.perf_counter()
+import clicker
+if MODE == 'gui':
+    import gui
+t1 = time.perf_counter()
+
+first = []
+done = threading.Event()
+def record(button, count):
+    if not first:
+        first.append(time.time_ns())
+        done.set()
+clicker.engine.add_channel('bench', record, clicker.engine.plan('left_click'))
+clicker.engine.start('bench')
+done.wait(5)
+clicker.engine.stop('bench')
+
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_kb = rss // 1024 if sys.platform == 'darwin' else rss
+except ImportError:
+    rss_kb = None
+print(json.dumps({'import_ms': (t1 - t0) * 1e3, 'first_click_ns': first[0] if first else None, 'rss_kb': rss_kb}))
+'''
+
+def run_once(mode, backend):
+    env = dict(os.environ, AUTOCLICKER_BACKEND=backend)
+    spawn_ns = time.time_ns()
+    out = subprocess.run(
+        [sys.executable, '-c', f'MODE = {mode!r}\n' + CHILD],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    first = result.pop('first_click_ns')
+    result['first_click_ms'] = (first - spawn_ns) / 1e6 if first else None
+    return result
+
+def summarize(samples):
+    summary = {}
+    for key in samples[0]:
+        values = [s[key] for s in samples if s[key] is not None]
+        summary[key] = statistics.median(values) if values else None
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modes', nargs='+', default=['headless', 'gui'], choices=['headless', 'gui'])
+    parser.add_argument('--backend', default='pynput', choices=['pynput', 'fake'],
+                        help="'fake' runs without pynput or a display (GUI mode still needs one)")
+    args = parser.parse_args()
+
+    report = {}
+    for mode in args.modes:
+        try:
+            report[mode] = summarize([run_once(mode, args.backend) for _ in range(args.runs)])
+        except subprocess.CalledProcessError as e:
+            report[mode] = {'error': e.stderr.strip().splitlines()[-1] if e.stderr else str(e)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
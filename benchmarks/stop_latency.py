@@ -0,0 +1,164 @@
+"""
+Stop latency check: how long stop, hold release, retune and the safety key
+take to affect clicking, whatever the configured interval, driven through
+the real hooks and click engine on the fake input backend.
+
+    python benchmarks/stop_latency.py [--runs 20] [--bound-ms 1.0] [--unbatched]
+
+Prints one JSON object with the latencies (microseconds) per scenario and
+exits with status 1 if any run exceeds the bound or clicks twice where it
+should click once. tests/test_stop_latency.py runs the same scenarios.
+"""
+import argparse
+import json
+import sys
+import time
+
+from _harness import load_clicker, summary
+
+BIND = 'f6'
+SAFETY = 'ctrl'
+FAST_CPS = 1000
+LONG_DELAY_MS = 5000
+SETTLE_NS = 15_000_000   # a click later than this after a stop or pause did not stop
+
+def configure(clicker, activation, mode, value):
+    section = clicker.config['left_click']
+    section.update({'activation': activation, 'mode': mode, mode: value, 'bind': BIND,
+                    'click_type': 'single', 'program': None, 'route': None})
+    clicker.config['safety_key'] = SAFETY
+    clicker.compile_plans()
+    clicker.compile_binds()
+
+def clicks_after(backend, t):
+    return [c for c in backend.clicks() if c > t]
+
+def wait_for_click(backend, after, timeout=1.0):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        later = clicks_after(backend, after)
+        if later:
+            return later[0]
+        time.sleep(0.001)   # click times come from the backend; slow polling leaves the CPU to the engine
+    return None
+
+def tap(backend, token):
+    backend.press(token)
+    backend.release(token)
+
+def stop_fast(clicker):
+    """Toggle off while clicking at FAST_CPS: the last click must follow the stop press within the bound."""
+    backend = clicker.backend
+    configure(clicker, 'toggle', 'cps', FAST_CPS)
+    backend.reset()
+    tap(backend, BIND)
+    time.sleep(0.03)
+    t = time.perf_counter_ns()
+    tap(backend, BIND)
+    time.sleep(0.02)
+    last = backend.clicks()[-1]
+    return max(0, last - t), 0
+
+def stop_long_delay(clicker):
+    """Toggle off and straight back on with a 5 s delay: exactly one new click, immediately."""
+    backend = clicker.backend
+    configure(clicker, 'toggle', 'delay', LONG_DELAY_MS)
+    backend.reset()
+    tap(backend, BIND)
+    wait_for_click(backend, 0)
+    time.sleep(0.01)
+    tap(backend, BIND)
+    t = time.perf_counter_ns()
+    tap(backend, BIND)
+    first = wait_for_click(backend, t)
+    time.sleep(0.05)
+    extra = len(clicks_after(backend, t)) - 1
+    tap(backend, BIND)
+    clicker.hooks.flush()
+    return (first - t if first else None), extra
+
+def hold_release(clicker):
+    """Release a hold bind while clicking at FAST_CPS."""
+    backend = clicker.backend
+    configure(clicker, 'hold', 'cps', FAST_CPS)
+    backend.reset()
+    backend.press(BIND)
+    time.sleep(0.03)
+    t = time.perf_counter_ns()
+    backend.release(BIND)
+    time.sleep(0.02)
+    last = backend.clicks()[-1]
+    return max(0, last - t), 0
+
+def retune(clicker):
+    """Shorten a 5 s delay to 10 ms while waiting: the next click must not wait out the old delay."""
+    backend = clicker.backend
+    configure(clicker, 'toggle', 'delay', LONG_DELAY_MS)
+    backend.reset()
+    tap(backend, BIND)
+    first = wait_for_click(backend, 0)
+    time.sleep(0.02)
+    t = time.perf_counter_ns()
+    clicker.config['left_click']['delay'] = 10
+    clicker.compile_plans()
+    nxt = wait_for_click(backend, first)
+    tap(backend, BIND)
+    clicker.hooks.flush()
+    return (nxt - t if nxt else None), 0
+
+def safety_pause(clicker):
+    """Hold the safety key while clicking at FAST_CPS: the last click must follow the press within the bound."""
+    backend = clicker.backend
+    configure(clicker, 'toggle', 'cps', FAST_CPS)
+    backend.reset()
+    tap(backend, BIND)
+    time.sleep(0.03)
+    t = time.perf_counter_ns()
+    backend.press(SAFETY)
+    time.sleep(0.02)
+    last = [c for c in backend.clicks() if c <= t + SETTLE_NS][-1]
+    late = clicks_after(backend, t + SETTLE_NS)
+    backend.release(SAFETY)
+    tap(backend, BIND)
+    clicker.hooks.flush()
+    return max(0, last - t), len(late)
+
+SCENARIOS = {
+    'stop_fast': stop_fast,
+    'stop_long_delay': stop_long_delay,
+    'hold_release': hold_release,
+    'retune': retune,
+    'safety_pause': safety_pause,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--bound-ms', type=float, default=1.0)
+    parser.add_argument('--unbatched', action='store_true', help="turn batched mode off")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    args = parser.parse_args()
+
+    clicker = load_clicker(listen=True, batched=not args.unbatched)
+    bound_us = args.bound_ms * 1e3
+    report = {}
+    failures = []
+    for name in args.scenarios:
+        latencies, extra = [], 0
+        for _ in range(args.runs):
+            latency, unexpected = SCENARIOS[name](clicker)
+            latencies.append(latency / 1e3 if latency is not None else float('inf'))
+            extra += unexpected
+        report[name] = dict(summary(latencies), unexpected_clicks=extra)
+        if report[name]['max_us'] > bound_us:
+            failures.append(f"{name}: {report[name]['max_us']:.0f} us > {bound_us:.0f} us")
+        if extra:
+            failures.append(f"{name}: {extra} unexpected clicks")
+    print(json.dumps(report, indent=2))
+    for line in failures:
+        sys.stderr.write(f"FAIL {line}\n")
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
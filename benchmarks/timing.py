@@ -0,0 +1,197 @@
+"""
+Click timing benchmark: achieved rate, interval error and hook-to-click
+latency of the real click engine, driven through the fake input backend.
+
+    python benchmarks/timing.py [--output results.json] [--baseline baseline.json]
+
+Every scenario toggles the left clicker on with a simulated bind press (the
+same on_press path the global hook uses), lets it run, and measures the
+recorded click timestamps. With --baseline, the run fails (exit status 1)
+when any scenario regresses beyond the tolerances.
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+from _harness import load_clicker, percentile
+
+BIND = 'f6'
+SAFETY = 'ctrl'
+SAFETY_PERIOD = 0.1   # seconds between safety key presses in 'safety' scenarios...
+SAFETY_EVERY = 3      # ...but at least this many intervals, so some intervals run unpaused
+SAFETY_HOLD = 0.02    # seconds the safety key is held each time
+MIN_INTERVALS = 5     # slow settings run long enough for at least this many intervals
+
+def configure(clicker, cps, mode, click_type):
+    section = clicker.config['left_click']
+    section.update({
+        'mode': mode,
+        'cps': cps,
+        'delay': max(1, round(1000 / cps)),
+        'bind': BIND,
+        'click_type': click_type,
+        'activation': 'toggle',
+    })
+    clicker.config['safety_key'] = SAFETY
+    clicker.compile_plans()
+    clicker.compile_binds()
+    return clicker.engine.plan('left_click')
+
+def run_scenario(clicker, cps, mode, click_type, safety, duration):
+    backend = clicker.backend
+    plan = configure(clicker, cps, mode, click_type)
+    interval_ns = plan.interval_ns   # per tick; covers 'batch' intervals in batched mode
+    duration = max(duration, MIN_INTERVALS * interval_ns / 1e9)
+    period = max(SAFETY_PERIOD, SAFETY_EVERY * interval_ns / 1e9)
+    if safety:
+        duration = max(duration, 2 * period + SAFETY_HOLD)
+
+    backend.reset()
+    hooks_before = clicker.hooks.snapshot()
+    pauses = []   # (press_ns, release_ns) of every safety hold
+    t_press = time.perf_counter_ns()
+    backend.press(BIND)
+    backend.release(BIND)
+    end = time.perf_counter() + duration
+    if safety:
+        next_hold = time.perf_counter() + period
+        while time.perf_counter() < end:
+            time.sleep(max(0.0, next_hold - time.perf_counter()))
+            p0 = time.perf_counter_ns()
+            backend.press(SAFETY)
+            time.sleep(SAFETY_HOLD)
+            p1 = time.perf_counter_ns()
+            backend.release(SAFETY)
+            pauses.append((p0, p1))
+            next_hold += period
+    else:
+        time.sleep(duration)
+    backend.press(BIND)      # toggle off
+    backend.release(BIND)
+    time.sleep(0.01)
+
+    times = list(backend.clicks())
+    hook_calls = 0
+    hook_max = 0
+    for name, snap in clicker.hooks.snapshot().items():
+        hook_calls += snap['calls'] - hooks_before[name]['calls']
+        hook_max = max(hook_max, snap['max_ns'])
+    result = {
+        'cps': cps, 'mode': mode, 'click_type': click_type, 'safety': safety,
+        'target_interval_us': interval_ns / 1e3,
+        'batch': plan.batch,
+        'inject_cost_us': clicker.engine.injection_cost_ns('left_click') / 1e3,
+        'clicks': len(times),
+        'hook_to_click_us': (times[0] - t_press) / 1e3 if times else None,
+        'hook_callbacks': hook_calls,
+        'hook_callback_max_us': hook_max / 1e3,
+    }
+
+    # Intervals touching a safety hold measure the pause, not the scheduler
+    intervals = []
+    for a, b in zip(times, times[1:]):
+        if any(p0 <= b and a <= p1 for p0, p1 in pauses):
+            continue
+        intervals.append(b - a)
+    errors = sorted(abs(i - interval_ns) / 1e3 for i in intervals)
+    achieved = len(intervals) * 1e9 / sum(intervals) if intervals else None   # ticks per second
+    result.update({
+        'achieved_rate': achieved * plan.batch if achieved else None,
+        'rate_ratio': achieved * interval_ns / 1e9 if achieved else None,
+        'error_p50_us': percentile(errors, 0.50),
+        'error_p99_us': percentile(errors, 0.99),
+        'error_max_us': errors[-1] if errors else None,
+    })
+    if pauses:
+        resumes = []
+        for _, p1 in pauses:
+            after = [t for t in times if t >= p1]
+            if after:
+                resumes.append((after[0] - p1) / 1e3)
+        resumes.sort()
+        result['resume_p50_us'] = percentile(resumes, 0.50)
+        result['resume_max_us'] = resumes[-1] if resumes else None
+    return result
+
+def scenario_key(r):
+    return f"{r['cps']}/{r['mode']}/{r['click_type']}/{'safety' if r['safety'] else 'plain'}"
+
+def compare(results, baseline, rate_tol, error_factor, error_slack_us):
+    """Return a list of human-readable regressions against 'baseline'."""
+    base = {scenario_key(r): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        key = scenario_key(r)
+        b = base.get(key)
+        if b is None:
+            continue
+        if r['rate_ratio'] is None and b['rate_ratio'] is not None:
+            regressions.append(f"{key}: no intervals measured (baseline had {b['clicks']} clicks)")
+        elif r['rate_ratio'] is not None and b['rate_ratio'] is not None:
+            if r['rate_ratio'] < b['rate_ratio'] - rate_tol:
+                regressions.append(f"{key}: rate ratio {r['rate_ratio']:.3f} < baseline {b['rate_ratio']:.3f}")
+        for metric in ('error_p99_us', 'hook_to_click_us'):
+            if r.get(metric) is None or b.get(metric) is None:
+                continue
+            limit = b[metric] * error_factor + error_slack_us
+            if r[metric] > limit:
+                regressions.append(f"{key}: {metric} {r[metric]:.0f} > limit {limit:.0f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cps', type=int, nargs='+', default=[1, 10, 50, 100, 200, 500, 1000])
+    parser.add_argument('--modes', nargs='+', default=['cps', 'delay'], choices=['cps', 'delay'])
+    parser.add_argument('--click-types', nargs='+', default=['single', 'double', 'triple'],
+                        choices=['single', 'double', 'triple'])
+    parser.add_argument('--safety', choices=['off', 'on', 'both'], default='both',
+                        help="toggle the safety key during the run")
+    parser.add_argument('--duration', type=float, default=1.0, help="seconds per scenario")
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', help="JSON report to compare against")
+    parser.add_argument('--rate-tolerance', type=float, default=0.05,
+                        help="allowed drop of achieved/target rate ratio")
+    parser.add_argument('--error-factor', type=float, default=2.0,
+                        help="allowed growth factor of p99 error and hook latency")
+    parser.add_argument('--error-slack-us', type=float, default=500.0,
+                        help="absolute slack added to the growth limit")
+    args = parser.parse_args()
+
+    clicker = load_clicker(listen=True)
+    safety_values = {'off': [False], 'on': [True], 'both': [False, True]}[args.safety]
+    results = []
+    for cps, mode, click_type, safety in itertools.product(args.cps, args.modes, args.click_types, safety_values):
+        r = run_scenario(clicker, cps, mode, click_type, safety, args.duration)
+        results.append(r)
+        sys.stderr.write(f"{scenario_key(r):32} rate {r['achieved_rate'] or 0:8.1f}/s"
+                         f"  p99 err {r['error_p99_us'] or 0:8.0f} us\n")
+
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.rate_tolerance, args.error_factor, args.error_slack_us)
+        for line in regressions:
+            sys.stderr.write(f"REGRESSION {line}\n")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
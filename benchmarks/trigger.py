@@ -0,0 +1,84 @@
+"""
+Pixel trigger benchmark: reaction latency from a region change to the first
+click (and from the change back to the clicker stopping), driven through the
+synthetic frame source and the fake input backend.
+
+    python benchmarks/trigger.py [--runs 50] [--poll-ms 5] [--size 32]
+
+Prints one JSON object with latency percentiles per match mode.
+"""
+import argparse
+import json
+import random
+import time
+
+from _harness import load_clicker, percentile
+
+IDLE = (0, 0, 0)
+HOT = (255, 0, 0)
+
+def run_mode(clicker, match, runs, poll_ms, size):
+    backend = clicker.backend
+    clicker.config['left_click'].update({'mode': 'cps', 'cps': 1000, 'program': None, 'route': None})
+    clicker.config['trigger'].update({
+        'source': 'synthetic', 'region': [0, 0, size, size], 'match': match,
+        'color': list(HOT), 'tolerance': 24, 'section': 'left_click', 'action': 'hold',
+        'poll_ms': poll_ms,
+    })
+    clicker.compile_plans()
+    source = clicker.trigger_source()
+    if match == 'patch':
+        source.fill(HOT)
+        clicker.capture_trigger_reference()
+    source.fill(IDLE)
+    clicker.start_trigger()
+
+    react, release = [], []
+    for _ in range(runs):
+        backend.reset()
+        source.fill(HOT)
+        t_on = source.changed_ns
+        deadline = time.perf_counter() + 1.0
+        while not backend.n and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        if backend.n:
+            react.append((backend.times[0] - t_on) / 1e3)
+        source.fill(IDLE)
+        t_off = source.changed_ns
+        deadline = time.perf_counter() + 1.0
+        while clicker.engine.is_active('left_click') and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        release.append((time.perf_counter_ns() - t_off) / 1e3)
+        time.sleep(random.uniform(1, 2) * poll_ms / 1000)  # change at a random poll phase
+        if match == 'change':
+            # 'change' compares with the region as it was when armed
+            clicker.stop_trigger()
+            clicker.start_trigger()
+    clicker.stop_trigger()
+
+    react.sort()
+    release.sort()
+    return {
+        'runs': runs,
+        'reacted': len(react),
+        'react_p50_us': percentile(react, 0.50),
+        'react_p99_us': percentile(react, 0.99),
+        'release_p50_us': percentile(release, 0.50),
+        'release_p99_us': percentile(release, 0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--poll-ms', type=int, default=5)
+    parser.add_argument('--size', type=int, default=32, help="region width and height in pixels")
+    parser.add_argument('--matches', nargs='+', default=['color', 'change', 'patch'],
+                        choices=['color', 'change', 'patch'])
+    args = parser.parse_args()
+
+    clicker = load_clicker()
+    report = {match: run_mode(clicker, match, args.runs, args.poll_ms, args.size) for match in args.matches}
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,666 @@
+import atexit
+import copy
+import os
+import sys
+import threading
+
+from backends import KEY_ALIASES, create_backend
+from clicktrace import MARK_SAVE, ClickTracer
+from config_store import ConfigWriter, config_dir, default_config, file_signature, load_config, read_config, validate_value
+from config_watch import ConfigWatcher
+from control import ControlError, ControlServer
+from engine import ClickEngine, ClickPlan
+from hooks import HookDispatcher
+from macro import BUTTON_DOWN, BUTTON_UP, KEY_DOWN, KEY_UP, MOVE, SCROLL, MacroRecorder, play as play_macro
+from programs import MIN_INTERVAL_NS, RateProgram
+from routes import ClickRoute
+from triggers import FrameMatcher, PixelTrigger, create_source
+from telemetry import MetricsServer, snapshot as telemetry_snapshot
+from ui_updates import CONFIG, LISTENING_DONE, STATE, UpdateQueue
+
+# -- Store config.yaml
+CONFIG_DIR = config_dir()
+os.makedirs(CONFIG_DIR, exist_ok=True)
+CONFIG_FILE = os.path.join(CONFIG_DIR, 'config.yaml')
+
+config_writer = ConfigWriter(CONFIG_FILE)
+atexit.register(config_writer.flush)
+
+def save_config(cfg):
+    """Queue 'cfg' for a write-behind save; returns immediately."""
+    config_writer.schedule(cfg)
+
+config = load_config(CONFIG_FILE)
+backend = create_backend()
+
+listening_for_bind = None  # (section, key) while capturing a bind
+
+# UI state changes are posted here from any thread and drained by the GUI's
+# pump on the Tk thread (nobody drains it when headless; topics just coalesce)
+ui_updates = UpdateQueue()
+
+held_tokens = set()         # bind tokens of every key/button currently down
+
+# Safety key: one or more tokens joined with '+' (e.g. "ctrl+shift", "mouse4").
+# The hooks keep 'safety_held' current; the engine is paused while it is set.
+safety_tokens = frozenset()
+safety_held = False
+safety_lock = threading.Lock()
+
+# -- Click plans
+# Each section is compiled into an immutable ClickPlan; the engine only ever
+# reads plans, never the 'config' dict the Tk thread is editing.
+SECTION_BUTTONS = {
+    'left_click': 'left',
+    'right_click': 'right',
+}
+CLICK_COUNTS = {'single': 1, 'double': 2, 'triple': 3}
+
+# (table, name) -> (spec, compiled); programs and routes are only rebuilt
+# when their spec changes, not on every plan compile or activation
+compiled_cache = {}
+
+def compile_named(table, name, factory, what):
+    """factory(config[table][name]), cached; None if unset, unknown or invalid."""
+    if not name:
+        return None
+    spec = config[table].get(name)
+    if spec is None:
+        sys.stderr.write(f"Unknown {what} {name!r}\n")
+        return None
+    cached = compiled_cache.get((table, name))
+    if cached is not None and cached[0] == spec:
+        return cached[1]
+    try:
+        compiled = factory(spec)
+    except (TypeError, ValueError, ArithmeticError) as e:
+        sys.stderr.write(f"Invalid {what} {name!r}: {e}\n")
+        return None
+    compiled_cache[(table, name)] = (copy.deepcopy(spec), compiled)
+    return compiled
+
+def compile_program(name):
+    """The RateProgram for config['programs'][name], or None."""
+    return compile_named('programs', name, RateProgram, "rate program")
+
+def compile_route(name):
+    """The ClickRoute for config['routes'][name], or None."""
+    return compile_named('routes', name, ClickRoute, "click route")
+
+def compile_plan(section, cfg=None):
+    """Build the ClickPlan for config[section], or for 'cfg' standing in for it."""
+    if cfg is None:
+        cfg = config[section]
+    defaults = default_config[section]
+    if cfg['mode'] == 'cps':
+        cps = cfg.get('cps', defaults['cps'])
+        if cps <= 0:
+            cps = 1
+        # Clamped so absurd rates (GUI entry, hand-edited config) cannot reach 0
+        interval_ns = max(MIN_INTERVAL_NS, int(1e9 / cps))
+    else:
+        delay_ms = cfg.get('delay', defaults['delay'])
+        interval_ns = max(1_000_000, int(delay_ms * 1_000_000))
+
+    click_count = CLICK_COUNTS.get(str(cfg.get('click_type', 'single')).lower(), 1)
+    program = compile_program(cfg.get('program'))
+    route = compile_route(cfg.get('route'))
+
+    # Batched mode: at high rates one tick injects several intervals' worth of
+    # clicks in one backend call, so the engine wakes (and spins) far less often
+    batch = 1
+    tuning = config['engine']
+    if (tuning['batch_cps'] and program is None and route is None
+            and interval_ns * tuning['batch_cps'] <= 1_000_000_000):
+        batch = max(1, tuning['batch_tick_ms'] * 1_000_000 // interval_ns)
+    return ClickPlan(SECTION_BUTTONS[section], click_count * batch, interval_ns * batch,
+                     cfg.get('activation', 'toggle'), program, route, batch)
+
+def compile_plans():
+    for section in SECTION_BUTTONS:
+        engine.set_plan(section, compile_plan(section))
+
+engine = ClickEngine()
+for _section in SECTION_BUTTONS:
+    engine.add_channel(_section, backend.click, compile_plan(_section), backend.click_at)
+
+# -- Click tracing (opt-in): every tick plus GC, save and redraw spans
+tracer = None
+if config['trace']['enabled']:
+    tracer = ClickTracer(engine.names(), max(1024, config['trace']['capacity']))
+    tracer.install_gc_hook()
+    config_writer.on_write = lambda start, end: tracer.record(MARK_SAVE, start, end)
+    engine.tracer = tracer
+
+def trace_path():
+    return os.path.join(CONFIG_DIR, config['trace']['file'])
+
+def dump_trace():
+    """Write the click trace to trace_path() for clicktrace.py to analyze."""
+    if tracer is None:
+        sys.stderr.write("Click tracing is off; set trace.enabled in config.yaml\n")
+        return
+    try:
+        n = tracer.dump(trace_path())
+    except OSError as e:
+        sys.stderr.write(f"Could not dump click trace: {e}\n")
+        return
+    sys.stderr.write(f"Wrote {n} trace records to {trace_path()}\n")
+
+def start_left_clicker():
+    engine.start('left_click')
+    refresh_ui()
+
+def stop_left_clicker():
+    engine.stop('left_click')
+    refresh_ui()
+
+def start_right_clicker():
+    engine.start('right_click')
+    refresh_ui()
+
+def stop_right_clicker():
+    engine.stop('right_click')
+    refresh_ui()
+
+def toggle_left_clicker():
+    if engine.is_active('left_click'):
+        stop_left_clicker()
+    else:
+        start_left_clicker()
+
+def toggle_right_clicker():
+    if engine.is_active('right_click'):
+        stop_right_clicker()
+    else:
+        start_right_clicker()
+
+# -- Macros
+macro_recorder = None       # MacroRecorder while recording
+macro_stop_motion = None    # stops the motion/wheel hook used while recording
+macro_cancel = None         # Event of the running playback, None when idle
+
+def macro_path():
+    return os.path.join(CONFIG_DIR, config['macro']['file'])
+
+def is_recording():
+    return macro_recorder is not None
+
+def is_playing():
+    return macro_cancel is not None
+
+def start_recording():
+    global macro_recorder, macro_stop_motion
+    if macro_recorder is not None or macro_cancel is not None:
+        return
+    try:
+        rec = MacroRecorder(macro_path(), moves=config['macro']['record_moves'])
+    except OSError as e:
+        sys.stderr.write(f"Could not record macro: {e}\n")
+        return
+    macro_stop_motion = backend.listen_motion(hooks.move, hooks.scroll)
+    macro_recorder = rec
+    refresh_ui()
+
+def stop_recording():
+    global macro_recorder, macro_stop_motion
+    rec = macro_recorder
+    if rec is None:
+        return
+    macro_recorder = None
+    macro_stop_motion()
+    macro_stop_motion = None
+    rec.stop()
+    refresh_ui()
+
+def toggle_recording():
+    if macro_recorder is not None:
+        stop_recording()
+    else:
+        start_recording()
+
+def playback_thread(cancel):
+    global macro_cancel
+    try:
+        play_macro(macro_path(), backend, cancel)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"Could not play macro: {e}\n")
+    finally:
+        if macro_cancel is cancel:
+            macro_cancel = None
+        refresh_ui()
+
+def start_playback():
+    global macro_cancel
+    if macro_cancel is not None or macro_recorder is not None:
+        return
+    macro_cancel = threading.Event()
+    threading.Thread(target=playback_thread, args=(macro_cancel,), name="macro-playback", daemon=True).start()
+    refresh_ui()
+
+def stop_playback():
+    global macro_cancel
+    cancel = macro_cancel
+    if cancel is None:
+        return
+    macro_cancel = None
+    cancel.set()
+    refresh_ui()
+
+def toggle_playback():
+    if macro_cancel is not None:
+        stop_playback()
+    else:
+        start_playback()
+
+# -- Pixel trigger
+# Drives a click section through the same start/stop functions as its bind
+SECTION_ACTIONS = {
+    'left_click': (start_left_clicker, stop_left_clicker),
+    'right_click': (start_right_clicker, stop_right_clicker),
+}
+
+pixel_trigger = None        # PixelTrigger while armed
+trigger_sources = {}        # source name -> FrameSource, created on first use
+
+def trigger_source():
+    name = config['trigger']['source']
+    source = trigger_sources.get(name)
+    if source is None:
+        source = trigger_sources[name] = create_source(name)
+    return source
+
+def trigger_reference_path():
+    return os.path.join(CONFIG_DIR, config['trigger']['reference'])
+
+def capture_trigger_reference():
+    """Save the trigger region as it looks now as the 'patch' reference."""
+    cfg = config['trigger']
+    try:
+        frame = trigger_source().grab(cfg['region'])
+        with open(trigger_reference_path(), 'wb') as f:
+            f.write(frame)
+    except Exception as e:
+        sys.stderr.write(f"Could not capture trigger reference: {e}\n")
+
+def is_trigger_armed():
+    return pixel_trigger is not None
+
+def start_trigger():
+    global pixel_trigger
+    if pixel_trigger is not None:
+        return
+    cfg = config['trigger']
+    region = cfg['region']
+    try:
+        source = trigger_source()
+        reference = None
+        if cfg['match'] == 'change':
+            reference = source.grab(region)
+        elif cfg['match'] == 'patch':
+            with open(trigger_reference_path(), 'rb') as f:
+                reference = f.read()
+        matcher = FrameMatcher(cfg['match'], cfg['tolerance'], cfg['color'], reference)
+    except Exception as e:
+        sys.stderr.write(f"Could not arm pixel trigger: {e}\n")
+        return
+    start, stop = SECTION_ACTIONS[cfg['section']]
+    noop = lambda: None
+    on_match, on_unmatch = {
+        'hold': (start, stop),
+        'start': (start, noop),
+        'stop': (stop, noop),
+    }[cfg['action']]
+    pixel_trigger = PixelTrigger(source, region, matcher, on_match, on_unmatch,
+                                 max(1, cfg['poll_ms']) / 1000)
+    refresh_ui()
+
+def stop_trigger():
+    global pixel_trigger
+    trigger = pixel_trigger
+    if trigger is None:
+        return
+    pixel_trigger = None
+    trigger.stop()
+    if trigger.matched and config['trigger']['action'] == 'hold':
+        trigger.on_unmatch()
+    refresh_ui()
+
+def toggle_trigger():
+    if pixel_trigger is not None:
+        stop_trigger()
+    else:
+        start_trigger()
+
+# -- Bind dispatch
+# The backend delivers events as lowercase tokens ('f6', 'a', 'alt',
+# 'mouse4', ...) and bind strings are normalized the same way. The binds are
+# compiled into 'bind_table' (token -> (on_down, on_up)) whenever they change,
+# so the hook callbacks only do a single dict lookup per event.
+# (section, key, start, stop, toggle) for every bindable action; add an entry
+# here to make a new action bindable. Click sections follow their plan's
+# activation mode, everything else toggles.
+BINDS = [
+    ('left_click', 'bind', start_left_clicker, stop_left_clicker, toggle_left_clicker),
+    ('right_click', 'bind', start_right_clicker, stop_right_clicker, toggle_right_clicker),
+    ('macro', 'record_bind', start_recording, stop_recording, toggle_recording),
+    ('macro', 'play_bind', start_playback, stop_playback, toggle_playback),
+    ('trigger', 'bind', start_trigger, stop_trigger, toggle_trigger),
+    ('trace', 'bind', dump_trace, dump_trace, dump_trace),
+]
+
+bind_table = {}
+
+def bind_token(bind_str):
+    """Normalize a configured bind string to a bind token."""
+    if not bind_str:
+        return None
+    ks = str(bind_str).lower()
+    return KEY_ALIASES.get(ks, ks)
+
+def compile_binds():
+    """Rebuild 'bind_table' from config and publish it with a single assignment."""
+    global bind_table
+    table = {}
+    for section, key, start, stop, toggle in BINDS:
+        token = bind_token(config[section].get(key))
+        if token is None or token in table:
+            continue  # first action wins a shared bind
+        if section in SECTION_BUTTONS and engine.plan(section).activation == 'hold':
+            table[token] = (start, stop)
+        else:
+            table[token] = (toggle, None)
+    bind_table = table
+    compile_safety()
+
+def compile_safety():
+    """Resolve config['safety_key'] into 'safety_tokens' and re-evaluate its state."""
+    global safety_tokens
+    parts = str(config.get('safety_key') or '').split('+')
+    safety_tokens = frozenset(bind_token(p.strip()) for p in parts if p.strip())
+    update_safety()
+
+def update_safety():
+    """Pause/resume the engine when the safety combination becomes (un)held."""
+    global safety_held
+    with safety_lock:
+        held = bool(safety_tokens) and safety_tokens <= held_tokens
+        if held == safety_held:
+            return
+        safety_held = held
+        if held:
+            engine.pause()
+        else:
+            engine.resume()
+
+def set_bind(section, bind_str, key='bind'):
+    config[section][key] = bind_str
+    compile_binds()
+    save_config(config)       # immediate save
+    refresh_ui()
+
+def clear_bind(section, key='bind'):
+    config[section][key] = None
+    compile_binds()
+    save_config(config)
+    refresh_ui()
+
+def refresh_ui():
+    ui_updates.post(STATE)
+
+def start_listening(section, key='bind'):
+    """Capture the next key/mouse button as config[section][key]."""
+    global listening_for_bind
+    listening_for_bind = (section, key)
+
+def cancel_listening():
+    global listening_for_bind
+    listening_for_bind = None  # (section, key) while capturing a bind
+    ui_updates.post(LISTENING_DONE)
+
+def on_press(token, t=None):
+    if listening_for_bind:
+        if token == 'esc':
+            # Cancel
+            cancel_listening()
+        elif token:
+            section, key = listening_for_bind
+            set_bind(section, token, key)
+            cancel_listening()
+        return
+
+    held_tokens.add(token)
+    if token in safety_tokens:
+        update_safety()
+
+    rec = macro_recorder
+    if rec is not None and token is not None and token not in bind_table:
+        rec.append(KEY_DOWN, token, t=t)
+
+    action = bind_table.get(token)
+    if action is not None:
+        action[0]()
+
+def on_release(token, t=None):
+    held_tokens.discard(token)
+    if token in safety_tokens:
+        update_safety()
+
+    if listening_for_bind:
+        return 
+
+    rec = macro_recorder
+    if rec is not None and token is not None and token not in bind_table:
+        rec.append(KEY_UP, token, t=t)
+
+    action = bind_table.get(token)
+    if action is not None and action[1] is not None:
+        action[1]()
+
+def on_click(x, y, token, pressed, t=None):
+    if listening_for_bind:
+        if pressed:  
+            if token:
+                section, key = listening_for_bind
+                set_bind(section, token, key)
+            cancel_listening()
+        return
+
+    if pressed:
+        held_tokens.add(token)
+    else:
+        held_tokens.discard(token)
+    if token in safety_tokens:
+        update_safety()
+
+    rec = macro_recorder
+    if rec is not None and token is not None and token not in bind_table:
+        rec.append(BUTTON_DOWN if pressed else BUTTON_UP, token, int(x), int(y), t)
+
+    action = bind_table.get(token)
+    if action is None:
+        return
+    if pressed:
+        action[0]()
+    elif action[1] is not None:
+        action[1]()
+
+def on_move(x, y, t=None):
+    rec = macro_recorder
+    if rec is not None and rec.moves:
+        rec.append(MOVE, None, int(x), int(y), t)
+
+def on_scroll(x, y, dx, dy, t=None):
+    rec = macro_recorder
+    if rec is not None:
+        rec.append(SCROLL, None, int(dx), int(dy), t)
+
+compile_binds()
+
+# The OS hooks only enqueue events; the handlers above run on the
+# dispatcher thread
+hooks = HookDispatcher(on_press, on_release, on_click, on_move, on_scroll)
+
+def start_metrics_server():
+    """Serve click telemetry on localhost if config['telemetry']['http_port'] is set."""
+    port = config['telemetry']['http_port']
+    if not port:
+        return None
+    try:
+        return MetricsServer(engine, port)
+    except (OSError, OverflowError) as e:
+        sys.stderr.write(f"Could not start metrics server on port {port}: {e}\n")
+        return None
+
+# -- Control API (see control.py). Changes go to the running engine and to
+# 'config' (the GUI is notified through ui_updates), but are not saved by the
+# API itself; the next save from the GUI or a bind change writes them out.
+RETUNABLE = ('cps', 'delay', 'click_type', 'activation', 'program', 'route')
+INVALID = object()
+
+def control_channel(channel):
+    if channel not in SECTION_BUTTONS:
+        raise ControlError(f"unknown channel {channel!r} (choose from {', '.join(SECTION_BUTTONS)})")
+    return channel
+
+def api_start(channel):
+    engine.start(control_channel(channel))
+    refresh_ui()
+
+def api_stop(channel):
+    engine.stop(control_channel(channel))
+    refresh_ui()
+
+def api_toggle(channel):
+    control_channel(channel)
+    (engine.stop if engine.is_active(channel) else engine.start)(channel)
+    refresh_ui()
+    return {'active': engine.is_active(channel)}
+
+def api_set(channel, **values):
+    """Retune a channel live; setting cps or delay also selects that mode."""
+    section = config[control_channel(channel)]
+    checked = {}
+    for key, value in values.items():
+        if key not in RETUNABLE:
+            raise ControlError(f"cannot set {key!r} (choose from {', '.join(RETUNABLE)})")
+        value = validate_value(key, value, INVALID)
+        if value is INVALID:
+            raise ControlError(f"invalid {key}: {values[key]!r}")
+        table = {'program': 'programs', 'route': 'routes'}.get(key)
+        if table is not None and value is not None and value not in config[table]:
+            raise ControlError(f"unknown {key} {value!r}")
+        checked[key] = value
+    if 'cps' in checked:
+        checked['mode'] = 'cps'
+    elif 'delay' in checked:
+        checked['mode'] = 'delay'
+    # Compile from a copy: 'config' only changes once the plan is built
+    plan = compile_plan(channel, dict(section, **checked))
+    section.update(checked)
+    engine.set_plan(channel, plan)
+    if 'activation' in checked:
+        compile_binds()
+    ui_updates.post(CONFIG)     # the GUI's widgets would otherwise write the old values back
+
+def api_stats(channel=None):
+    snap = telemetry_snapshot(engine)
+    if channel is not None:
+        snap = {control_channel(channel): snap[channel]}
+    return {'stats': snap}
+
+def api_status():
+    return {
+        'paused': safety_held,
+        'channels': {
+            name: dict({key: config[name][key] for key in ('mode',) + RETUNABLE},
+                       active=engine.is_active(name))
+            for name in SECTION_BUTTONS
+        },
+        'programs': list(config['programs']),
+        'routes': list(config['routes']),
+    }
+
+CONTROL_COMMANDS = {
+    'start': api_start,
+    'stop': api_stop,
+    'toggle': api_toggle,
+    'set': api_set,
+    'stats': api_stats,
+    'status': api_status,
+}
+
+def start_control_server():
+    """Serve the control API if config['control'] names a socket or port."""
+    cfg = config['control']
+    path = os.path.join(CONFIG_DIR, cfg['socket']) if cfg['socket'] else None
+    if path is None and not cfg['port']:
+        return None
+    try:
+        return ControlServer(CONTROL_COMMANDS, port=cfg['port'], path=path)
+    except (OSError, OverflowError, NotImplementedError) as e:
+        sys.stderr.write(f"Could not start control server: {e}\n")
+        return None
+
+# -- Hot reload: external edits of config.yaml are diffed against 'config' and
+# only what changed is reapplied; a channel whose plan inputs are unchanged
+# keeps clicking untouched. 'config' is updated in place because the GUI
+# holds a reference to it.
+RESTART_SECTIONS = ('telemetry', 'control', 'trace', 'reload')
+BIND_SECTIONS = frozenset(section for section, *_ in BINDS) | {'safety_key'}
+
+def plan_inputs(cfg, section):
+    """Everything compile_plan(section) reads from 'cfg'."""
+    s = cfg[section]
+    return (s, cfg['programs'].get(s.get('program')), cfg['routes'].get(s.get('route')), cfg['engine'])
+
+def reload_config():
+    """Apply CONFIG_FILE to the running app if it changed since we last saved it."""
+    signature = file_signature(CONFIG_FILE)
+    if signature == config_writer.written:
+        return  # our own save
+    loaded = read_config(CONFIG_FILE)
+    if loaded is None:
+        sys.stderr.write(f"Ignoring edit of {CONFIG_FILE}: it is not a valid config\n")
+        return
+    changed = {key for key, value in loaded.items() if value != config.get(key)}
+    if not changed:
+        return
+    replan = [s for s in SECTION_BUTTONS if plan_inputs(config, s) != plan_inputs(loaded, s)]
+    rearm = pixel_trigger is not None and 'trigger' in changed
+    if rearm:
+        stop_trigger()
+
+    with config_writer.copy_lock:
+        for key in changed:
+            old, new = config.get(key), loaded[key]
+            if isinstance(old, dict) and isinstance(new, dict):
+                old.update(new)
+                for gone in old.keys() - new.keys():
+                    del old[gone]
+            else:
+                config[key] = new
+    # A save queued (or being written) from before the edit must not undo it
+    config_writer.supersede(config, signature)
+
+    for section in replan:
+        engine.set_plan(section, compile_plan(section))
+    if changed & BIND_SECTIONS:
+        compile_binds()
+    if rearm:
+        start_trigger()
+    for key in changed.intersection(RESTART_SECTIONS):
+        sys.stderr.write(f"Reloaded '{key}' settings take effect on restart\n")
+    ui_updates.post(CONFIG)
+    refresh_ui()
+
+def start_config_watcher():
+    """Watch CONFIG_FILE for external edits if config['reload'] enables it."""
+    cfg = config['reload']
+    if not cfg['enabled']:
+        return None
+    return ConfigWatcher(CONFIG_FILE, reload_config, max(10, cfg['poll_ms']) / 1000)
+
+def start_listeners():
+    """Start delivering global key/mouse events to the hooks; returns the listener thread."""
+    return backend.start_listening(hooks.press, hooks.release, hooks.click)
@@ -0,0 +1,194 @@
+"""
+Per-click tracing for debugging individual stalls.
+
+When enabled, the engine records every tick's scheduled deadline, actual
+injection time and channel id into a fixed-size ring of preallocated arrays;
+recording is a few array stores, with no allocation. Spans of things that
+can stall clicking (garbage collection, config saves, UI redraws) go into
+the same ring as markers with negative ids, so an analysis can tell what was
+happening when a click came late.
+
+Dump file layout (native byte order, recorded in the header):
+
+    header  MAGIC, byte order, padding, uint64 n                  24 bytes
+    columns start[n] int64, end[n] int64, id[n] int8, pad to 8
+    footer  JSON {"channels": [...], "markers": {...}}, uint64 length, END_MAGIC
+
+For a click, start is the scheduled deadline and end the middle of the
+injection (perf_counter_ns); for a marker they bound the span. The columns can be
+read with numpy.frombuffer directly.
+
+    python clicktrace.py trace.bin [--threshold-us 1000]
+
+summarizes lateness per channel and lists the outliers with any markers
+that overlap them.
+"""
+import argparse
+import gc
+import json
+import struct
+import sys
+import threading
+import time
+from array import array
+
+MAGIC = b'ACTRACE1'
+END_MAGIC = b'ACTREND1'
+HEADER = struct.Struct('=8sc7xQ')
+FOOTER_TAIL = struct.Struct('=Q8s')
+
+# Marker ids (channels are 0, 1, ... in engine order)
+MARK_GC, MARK_SAVE, MARK_REDRAW = -1, -2, -3
+MARKERS = {MARK_GC: 'gc', MARK_SAVE: 'config save', MARK_REDRAW: 'ui redraw'}
+
+class ClickTracer:
+    """Fixed-size ring of (start, end, id) records; the oldest are overwritten."""
+
+    def __init__(self, channels, capacity=65536):
+        self.channels = list(channels)
+        self.capacity = capacity
+        self.start = array('q', bytes(8 * capacity))
+        self.end = array('q', bytes(8 * capacity))
+        self.ids = array('b', bytes(capacity))
+        self._pos = 0           # next slot to write
+        self._full = False      # the ring has wrapped at least once
+        self._lock = threading.Lock()   # the engine, GC, saver and Tk threads all write
+        self._gc_start = 0
+
+    def record(self, ident, start, end):
+        with self._lock:
+            i = self._pos
+            self.start[i] = start
+            self.end[i] = end
+            self.ids[i] = ident
+            if i + 1 < self.capacity:
+                self._pos = i + 1
+            else:
+                self._pos = 0
+                self._full = True
+
+    def gc_callback(self, phase, info):
+        """For gc.callbacks: marks every collection."""
+        if phase == 'start':
+            self._gc_start = time.perf_counter_ns()
+        else:
+            self.record(MARK_GC, self._gc_start, time.perf_counter_ns())
+
+    def install_gc_hook(self):
+        gc.callbacks.append(self.gc_callback)
+
+    def remove_gc_hook(self):
+        if self.gc_callback in gc.callbacks:
+            gc.callbacks.remove(self.gc_callback)
+
+    def dump(self, path):
+        """Write the buffered records, oldest first, to 'path'; returns how many."""
+        with self._lock:
+            if not self._full:
+                parts = [slice(0, self._pos)]
+            else:
+                parts = [slice(self._pos, self.capacity), slice(0, self._pos)]
+            columns = [array(col.typecode) for col in (self.start, self.end, self.ids)]
+            for part in parts:
+                for out, col in zip(columns, (self.start, self.end, self.ids)):
+                    out.extend(col[part])
+        n = len(columns[0])
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), n))
+            for column in columns:
+                f.write(column)
+            f.write(bytes(-n % 8))
+            footer = json.dumps({'channels': self.channels,
+                                 'markers': {str(k): v for k, v in MARKERS.items()}}).encode('utf-8')
+            f.write(footer)
+            f.write(FOOTER_TAIL.pack(len(footer), END_MAGIC))
+        return n
+
+def load_trace(path):
+    """Read a dump: (start, end, ids, channels) with array columns."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, order, n = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a click trace")
+    if order != sys.byteorder[0].encode():
+        raise ValueError(f"{path} was written with a different byte order")
+    footer_len, end_magic = FOOTER_TAIL.unpack_from(data, len(data) - FOOTER_TAIL.size)
+    if end_magic != END_MAGIC:
+        raise ValueError(f"{path} is incomplete")
+    off = HEADER.size
+    columns = []
+    for typecode, width in (('q', 8), ('q', 8), ('b', 1)):
+        col = array(typecode)
+        col.frombytes(data[off:off + width * n])
+        columns.append(col)
+        off += width * n
+    footer_start = len(data) - FOOTER_TAIL.size - footer_len
+    meta = json.loads(data[footer_start:footer_start + footer_len])
+    return columns[0], columns[1], columns[2], meta['channels']
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+def analyze(start, end, ids, channels, threshold_ns):
+    """Summary dict: lateness per channel, marker totals and the outlier clicks."""
+    spans = [(start[i], end[i], MARKERS.get(ids[i], str(ids[i]))) for i in range(len(ids)) if ids[i] < 0]
+    late = {}
+    outliers = []
+    for i in range(len(ids)):
+        ident = ids[i]
+        if ident < 0:
+            continue
+        name = channels[ident] if ident < len(channels) else str(ident)
+        lateness = end[i] - start[i]
+        late.setdefault(name, []).append(lateness)
+        if lateness > threshold_ns:
+            # Anything that was running between the deadline and the injection
+            causes = sorted({label for s, e, label in spans if s <= end[i] and e >= start[i]})
+            outliers.append({'channel': name, 'scheduled_ns': start[i],
+                             'late_us': lateness / 1e3, 'during': causes})
+    summary = {}
+    for name, values in late.items():
+        values.sort()
+        summary[name] = {
+            'clicks': len(values),
+            'late_p50_us': percentile(values, 0.50) / 1e3,
+            'late_p99_us': percentile(values, 0.99) / 1e3,
+            'late_max_us': values[-1] / 1e3,
+        }
+    markers = {}
+    for s, e, label in spans:
+        m = markers.setdefault(label, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        m['count'] += 1
+        m['total_ms'] += (e - s) / 1e6
+        m['max_ms'] = max(m['max_ms'], (e - s) / 1e6)
+    return {'channels': summary, 'markers': markers, 'outliers': outliers}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a click trace dump")
+    parser.add_argument('path')
+    parser.add_argument('--threshold-us', type=float, default=1000.0,
+                        help="clicks later than this are listed as outliers")
+    parser.add_argument('--json', action='store_true', help="print the full summary as JSON")
+    args = parser.parse_args(argv)
+
+    start, end, ids, channels = load_trace(args.path)
+    report = analyze(start, end, ids, channels, int(args.threshold_us * 1e3))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for name, s in report['channels'].items():
+        print(f"{name:12} {s['clicks']:8} clicks  late p50 {s['late_p50_us']:8.0f} us"
+              f"  p99 {s['late_p99_us']:8.0f} us  max {s['late_max_us']:8.0f} us")
+    for label, m in report['markers'].items():
+        print(f"{label:12} {m['count']:8} spans   total {m['total_ms']:8.1f} ms  max {m['max_ms']:8.2f} ms")
+    outliers = report['outliers']
+    print(f"{len(outliers)} clicks later than {args.threshold_us:.0f} us")
+    for o in outliers[:50]:
+        during = f"  during {', '.join(o['during'])}" if o['during'] else ""
+        print(f"  {o['channel']:12} {o['late_us']:10.0f} us{during}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+import copy
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import yaml
+
+# Prefer the libyaml-backed loader/dumper when PyYAML was built with it
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+APP_DIR_NAME = 'AutoClickerByTheNano'
+SAVE_DELAY = 0.5  # seconds of quiet before pending changes are written
+
+def config_dir():
+    """Per-platform directory holding config.yaml."""
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Roaming'))
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser(os.path.join('~', 'Library', 'Application Support'))
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser(os.path.join('~', '.config'))
+    return os.path.join(base, APP_DIR_NAME)
+
+# -- Default config
+default_config = {
+    'left_click': {
+        'mode': 'cps',          # 'cps' or 'delay'
+        'cps': 10,              # clicks per second
+        'delay': 100,           # ms
+        'bind': None,           # e.g. "f6", "mouse4", "middle", ...
+        'click_type': 'single', # 'single', 'double', 'triple'
+        'activation': 'toggle', # 'toggle' or 'hold'
+        'program': None,        # name of a rate program; overrides cps/delay
+        'route': None,          # name of a click route; clicks its points in turn
+    },
+    'right_click': {
+        'mode': 'delay',        # 'cps' or 'delay'
+        'cps': 5,               # clicks per second
+        'delay': 200,           # ms
+        'bind': None,           # e.g. "mouse5", "r", "left", ...
+        'click_type': 'single', # 'single', 'double', 'triple'
+        'activation': 'toggle', # 'toggle' or 'hold'
+        'program': None,        # name of a rate program; overrides cps/delay
+        'route': None,          # name of a click route; clicks its points in turn
+    },
+    'safety_key': 'alt',        # hold this to pause clicking
+    'macro': {
+        'record_bind': None,    # toggles macro recording
+        'play_bind': None,      # toggles macro playback
+        'file': 'macro.bin',    # relative to the config directory
+        'record_moves': True,   # record pointer motion, not just keys/buttons/wheel
+    },
+    'engine': {
+        'batch_cps': 500,       # at or above this rate, inject several clicks per tick; 0 = never
+        'batch_tick_ms': 8,     # tick period in batched mode
+    },
+    # Named rate programs (see programs.py for every option)
+    'programs': {
+        'ramp_up': {'type': 'ramp', 'start_cps': 5, 'end_cps': 50, 'duration': 10,
+                    'curve': 'linear', 'then': 'hold'},
+        'bursts': {'type': 'burst', 'cps': 20, 'clicks': 10, 'rest_ms': 500},
+        'humanized': {'type': 'random', 'distribution': 'normal', 'mean_ms': 100, 'spread_ms': 15},
+    },
+    # Named click routes (see routes.py)
+    'routes': {},
+    # Start/stop clicking when a screen region changes (see triggers.py)
+    'trigger': {
+        'bind': None,           # toggles the trigger on/off
+        'source': 'screen',     # 'screen' or 'synthetic' (benchmarks)
+        'region': [0, 0, 8, 8], # x, y, width, height
+        'match': 'color',       # 'color', 'change' or 'patch'
+        'color': [255, 0, 0],   # RGB for 'color'
+        'tolerance': 24,        # per channel for 'color', mean abs difference otherwise
+        'reference': 'trigger.rgb',  # 'patch' reference, captured from the region
+        'section': 'left_click',
+        'action': 'hold',       # 'hold' (click while matched), 'start' or 'stop'
+        'poll_ms': 5,
+    },
+    'telemetry': {
+        'http_port': 0,         # serve /metrics on 127.0.0.1:<port>; 0 disables it
+    },
+    # Local control API (see control.py)
+    'control': {
+        'port': 0,              # serve on 127.0.0.1:<port>; 0 disables it
+        'socket': None,         # or a Unix socket, e.g. "control.sock" in the config directory
+    },
+    # Pick up external edits of config.yaml while running (see config_watch.py)
+    'reload': {
+        'enabled': True,
+        'poll_ms': 500,         # stat() interval where inotify is unavailable
+    },
+    # Per-click trace for debugging stalls (see clicktrace.py)
+    'trace': {
+        'enabled': False,       # record every click (takes effect on restart)
+        'capacity': 65536,      # clicks/markers kept; older ones are overwritten
+        'bind': None,           # dumps the trace
+        'file': 'trace.bin',    # relative to the config directory
+    },
+}
+
+CHOICES = {
+    'mode': ('cps', 'delay'),
+    'click_type': ('single', 'double', 'triple'),
+    'activation': ('toggle', 'hold'),
+    'source': ('screen', 'synthetic'),
+    'match': ('color', 'change', 'patch'),
+    'section': ('left_click', 'right_click'),
+    'action': ('hold', 'start', 'stop'),
+}
+
+# Inclusive (min, max) of numeric settings; other ints only need to be >= 0
+LIMITS = {
+    'cps': (1, 100_000),
+    'delay': (1, 86_400_000),   # a day, in ms
+    'batch_cps': (0, 100_000),
+    'batch_tick_ms': (1, 1000),
+    'tolerance': (0, 255),
+    'poll_ms': (1, 60_000),
+    'capacity': (1024, 1 << 24),
+    'http_port': (0, 65535),
+    'port': (0, 65535),
+}
+
+def to_int(value, limits=(0, None)):
+    """int(value) if it is a number within 'limits' (inclusive, None = unbounded), else None."""
+    if isinstance(value, bool):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    lo, hi = limits
+    if value < lo or (hi is not None and value > hi):
+        return None
+    return value
+
+def validate_value(key, value, default):
+    """Return 'value' if it is acceptable for 'key', otherwise 'default'."""
+    if key in CHOICES:
+        value = str(value).lower()
+        return value if value in CHOICES[key] else default
+    if key in ('bind', 'record_bind', 'play_bind', 'program', 'route', 'socket', 'safety_key'):
+        if value is None:
+            return None if key != 'safety_key' else default
+        return str(value)
+    if key in ('file', 'reference'):
+        return str(value) if value else default
+    if isinstance(default, list):
+        # Fixed-length lists of non-negative ints (region, color)
+        if not isinstance(value, (list, tuple)) or len(value) != len(default):
+            return default
+        value = [to_int(v, (0, 255) if key == 'color' else (0, 1 << 30)) for v in value]
+        return default if None in value else value
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else default
+    if key in LIMITS or isinstance(default, int):
+        value = to_int(value, LIMITS.get(key, (0, None)))
+        return default if value is None else value
+    return value
+
+def merge_config(loaded):
+    """Overlay a loaded config on default_config, keeping only valid known keys."""
+    cfg = copy.deepcopy(default_config)
+    if not isinstance(loaded, dict):
+        return cfg
+    for key, default in default_config.items():
+        if key not in loaded:
+            continue
+        if key in ('programs', 'routes'):
+            # Free-form mappings; each spec is validated when it is compiled
+            if isinstance(loaded[key], dict):
+                cfg[key] = {str(name): dict(spec) for name, spec in loaded[key].items()
+                            if isinstance(spec, dict)}
+        elif isinstance(default, dict):
+            section = loaded[key]
+            if not isinstance(section, dict):
+                continue
+            for sub, sub_default in default.items():
+                if sub in section:
+                    cfg[key][sub] = validate_value(sub, section[sub], sub_default)
+        else:
+            cfg[key] = validate_value(key, loaded[key], default)
+    return cfg
+
+def read_config(path):
+    """Read 'path' and merge it over the defaults; None if it is missing, unparsable or not a mapping."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            loaded = yaml.load(f, Loader=YamlLoader)
+    except (OSError, yaml.YAMLError):
+        return None
+    if not isinstance(loaded, dict):
+        return None
+    return merge_config(loaded)
+
+def load_config(path):
+    """Read 'path' and merge it over the defaults; missing or corrupt files give the defaults."""
+    cfg = read_config(path)
+    return cfg if cfg is not None else merge_config(None)
+
+def file_signature(path):
+    """(mtime_ns, size, inode) of 'path', or None if it does not exist; one stat() call."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def write_config_atomic(path, cfg):
+    """Write 'cfg' to a temp file next to 'path', fsync it and rename it over 'path'."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            yaml.dump(cfg, f, Dumper=YamlDumper)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class ConfigWriter:
+    """
+    Write-behind persistence for the config. schedule() only snapshots the
+    config and returns, so it is safe to call from the input hooks; a
+    background thread writes the latest snapshot once changes have been quiet
+    for SAVE_DELAY seconds, coalescing every save requested in between.
+    """
+
+    def __init__(self, path, delay=SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = None
+        self._last = 0.0
+        self._thread = None
+        self.on_write = None    # callable(start_ns, end_ns) after each write, for tracing
+        self.written = None     # file_signature() after our last write, so reloads can skip it
+        # Held while a snapshot is copied; hold it to add or remove keys of the
+        # config from another thread, so the copy never sees a dict change size
+        self.copy_lock = threading.Lock()
+
+    def schedule(self, cfg):
+        with self.copy_lock:
+            snapshot = copy.deepcopy(cfg)
+        with self._cond:
+            self._pending = snapshot
+            self._last = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def supersede(self, cfg, signature):
+        """
+        'cfg' was just reloaded from the file as it was at 'signature': make
+        sure no snapshot taken before the reload ends up on disk over it.
+        """
+        with self._write_lock:  # wait out a write in progress
+            with self._cond:
+                stale = self._pending is not None
+            if stale or file_signature(self.path) != signature:
+                self.schedule(cfg)
+
+    def flush(self):
+        """Write any pending snapshot now (called on exit)."""
+        with self._write_lock:
+            with self._cond:
+                snapshot, self._pending = self._pending, None
+            if snapshot is not None:
+                start = time.perf_counter_ns()
+                write_config_atomic(self.path, snapshot)
+                self.written = file_signature(self.path)
+                if self.on_write is not None:
+                    self.on_write(start, time.perf_counter_ns())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                while True:
+                    remaining = self._last + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            try:
+                self.flush()
+            except OSError as e:
+                sys.stderr.write(f"Could not save {self.path}: {e}\n")
@@ -0,0 +1,128 @@
+"""
+Watch config.yaml for edits made outside the app.
+
+On Linux the watcher blocks on inotify (via ctypes, no extra dependency) on
+the file's directory, so editors that save by writing a temp file and
+renaming it over the original are seen too, and nothing is read until the
+file actually changes. Elsewhere it falls back to polling a stat signature
+(mtime, size, inode): one stat() call per poll, and the file is only read
+when the signature differs.
+
+Either way on_change() runs on the watcher's own thread, after the file has
+been quiet for SETTLE_S, so a burst of writes from one save is reported once.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+from config_store import file_signature
+
+SETTLE_S = 0.05
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT = struct.Struct('iIII')   # wd, mask, cookie, len; followed by len bytes of name
+
+def open_inotify(directory):
+    """A non-blocking inotify fd watching 'directory', or None where inotify is unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+def event_names(data):
+    """The file names in a buffer of inotify events."""
+    names = []
+    off = 0
+    while off + EVENT.size <= len(data):
+        _, _, _, length = EVENT.unpack_from(data, off)
+        off += EVENT.size
+        names.append(data[off:off + length].rstrip(b'\0'))
+        off += length
+    return names
+
+class ConfigWatcher:
+    """
+    Calls on_change() after 'path' is modified. 'poll_s' is the stat interval
+    without inotify, and how often the inotify loop checks for stop().
+    """
+
+    def __init__(self, path, on_change, poll_s=0.5):
+        self.path = path
+        self.on_change = on_change
+        self.poll_s = poll_s
+        self.changes = 0        # on_change() calls
+        self._name = os.fsencode(os.path.basename(path))
+        self._cancel = threading.Event()
+        self._fd = open_inotify(os.path.dirname(path) or '.')
+        self.method = 'inotify' if self._fd is not None else 'stat'
+        self._thread = threading.Thread(target=self._run, name="config-watch", daemon=True)
+        self._thread.start()
+
+    def _changed(self):
+        self._cancel.wait(SETTLE_S)
+        if self._fd is not None:
+            self._drain()       # events from the rest of the same save
+        if self._cancel.is_set():
+            return
+        self.changes += 1
+        try:
+            self.on_change()
+        except Exception as e:
+            sys.stderr.write(f"Could not reload {self.path}: {e}\n")
+
+    def _drain(self):
+        """Read every pending event; True if any of them is for our file."""
+        hit = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return hit
+            if not data:
+                return hit
+            hit = hit or self._name in event_names(data)
+
+    def _run(self):
+        if self._fd is not None:
+            self._run_inotify()
+        else:
+            self._run_stat()
+
+    def _run_inotify(self):
+        try:
+            while not self._cancel.is_set():
+                ready, _, _ = select.select([self._fd], [], [], self.poll_s)
+                if ready and self._drain():
+                    self._changed()
+        finally:
+            os.close(self._fd)
+
+    def _run_stat(self):
+        last = file_signature(self.path)
+        while not self._cancel.wait(self.poll_s):
+            sig = file_signature(self.path)
+            if sig != last and sig is not None:
+                self._changed()
+                sig = file_signature(self.path)
+            last = sig
+
+    def stop(self):
+        self._cancel.set()
+        self._thread.join()
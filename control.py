@@ -0,0 +1,148 @@
+"""
+Local control server: scripted start/stop/retune over a Unix domain socket
+or loopback TCP.
+
+The protocol is newline-delimited JSON. Each request line is one command
+object or a list of them (a batch, answered in one round trip); each
+response line is the matching result object or list:
+
+    > {"cmd": "set", "channel": "left_click", "cps": 40}
+    < {"ok": true}
+    > [{"cmd": "start", "channel": "left_click"}, {"cmd": "stats"}]
+    < [{"ok": true}, {"ok": true, "stats": {...}}]
+
+Commands run synchronously on the server's own asyncio thread and go
+straight to the click engine; they never wait on the Tk thread or a config
+save. A line that is not JSON, or not made of known commands, closes the
+connection without running any of it, so a browser request sent to the port
+(an HTTP request line first, a JSON body later) can never start clicking.
+"""
+import json
+import os
+import socket
+import sys
+import threading
+
+MAX_LINE = 1 << 16
+
+class ControlError(Exception):
+    """A command failed; the message is sent back to the client."""
+
+def is_command(commands, request):
+    return isinstance(request, dict) and isinstance(request.get('cmd'), str) and request['cmd'] in commands
+
+def run_command(commands, request):
+    args = dict(request)
+    name = args.pop('cmd')
+    handler = commands[name]
+    try:
+        result = handler(**args)
+    except TypeError as e:
+        return {'ok': False, 'error': f"bad arguments for {name!r}: {e}"}
+    except ControlError as e:
+        return {'ok': False, 'error': str(e)}
+    except Exception as e:
+        # A bug in a handler must not drop the connection (or the server)
+        return {'ok': False, 'error': f"{name!r} failed: {type(e).__name__}: {e}"}
+    response = {'ok': True}
+    if result:
+        response.update(result)
+    return response
+
+def handle_line(commands, line):
+    """Decode one request line: (encoded response line, whether to keep the connection)."""
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        response, keep = {'ok': False, 'error': f"invalid JSON: {e}"}, False
+    else:
+        batch = request if isinstance(request, list) else [request]
+        if not all(is_command(commands, r) for r in batch):
+            response, keep = {'ok': False, 'error': f"unknown command; known: {', '.join(commands)}"}, False
+        elif isinstance(request, list):
+            response, keep = [run_command(commands, r) for r in request], True
+        else:
+            response, keep = run_command(commands, request), True
+    return json.dumps(response).encode('utf-8') + b'\n', keep
+
+class ControlProtocol:
+    """
+    An asyncio.Protocol, written out rather than subclassed so that importing
+    this module does not import asyncio while the server is off.
+    """
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def data_received(self, data):
+        self.buffer += data
+        if b'\n' not in self.buffer:
+            if len(self.buffer) > MAX_LINE:
+                self.transport.close()
+            return
+        *lines, self.buffer = self.buffer.split(b'\n')
+        out = []
+        for line in lines:
+            if not line.strip():
+                continue
+            response, keep = handle_line(self.commands, line)
+            out.append(response)
+            if not keep:
+                self.transport.write(b''.join(out))
+                self.transport.close()
+                self.buffer = b''
+                return
+        self.transport.write(b''.join(out))
+
+    def eof_received(self):
+        return None
+
+    def connection_lost(self, exc):
+        pass
+
+    def pause_writing(self):
+        pass
+
+    def resume_writing(self):
+        pass
+
+class ControlServer:
+    """
+    Serves 'commands' ({name: callable(**args) -> dict or None}) on the Unix
+    socket 'path' or on 127.0.0.1:'port' from a background event loop.
+    """
+
+    def __init__(self, commands, port=0, path=None):
+        import asyncio
+        self.path = path
+        self._loop = asyncio.new_event_loop()
+        factory = lambda: ControlProtocol(commands)
+        if path is not None:
+            if os.path.exists(path):
+                os.unlink(path)  # left over from a previous run
+            create = self._loop.create_unix_server(factory, path)
+        else:
+            create = self._loop.create_server(factory, '127.0.0.1', port)
+        self._server = self._loop.run_until_complete(create)
+        self.address = self._server.sockets[0].getsockname()
+        self.thread = threading.Thread(target=self._loop.run_forever, name="control", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        def shutdown():
+            self._server.close()
+            self._loop.stop()
+        self._loop.call_soon_threadsafe(shutdown)
+        self.thread.join()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError as e:
+                sys.stderr.write(f"Could not remove {self.path}: {e}\n")
@@ -0,0 +1,284 @@
+import heapq
+import sys
+import threading
+import time
+
+from telemetry import ChannelStats
+
+# Clicks are scheduled on absolute perf_counter_ns() deadlines so that neither
+# the injection cost nor sleep overshoot accumulates into the period.
+SPIN_THRESHOLD_NS = 2_000_000  # ns before a deadline to stop sleeping and spin
+
+# Injection itself takes time (a triple click is six input events). Each
+# channel keeps a running average of its injection cost and starts injecting
+# half of it early, so the middle of the injection lands on the deadline.
+# Lateness in the stats and traces is measured at that midpoint.
+COST_SMOOTHING = 3             # EWMA weight 1/2**COST_SMOOTHING for new samples
+
+# Windows rounds Condition/Event wait timeouts to the system timer tick, 15.6 ms
+# by default and far beyond SPIN_THRESHOLD_NS. While anything needs precise
+# timing (a running channel, macro playback) the tick is raised to 1 ms.
+fine_timer_users = 0
+fine_timer_lock = threading.Lock()
+
+def fine_timer(enable):
+    """Reference-counted timeBeginPeriod(1)/timeEndPeriod(1); a no-op off Windows."""
+    global fine_timer_users
+    if sys.platform != 'win32':
+        return
+    import ctypes
+    with fine_timer_lock:
+        fine_timer_users += 1 if enable else -1
+        if fine_timer_users == (1 if enable else 0):
+            winmm = ctypes.windll.winmm
+            (winmm.timeBeginPeriod if enable else winmm.timeEndPeriod)(1)
+
+def next_deadline(deadline, interval, now):
+    """
+    Advance 'deadline' by one interval. If we have fallen more than a whole
+    interval behind, the missed ticks are skipped (never burst-fired) and the
+    schedule re-anchors to now.
+    """
+    deadline += interval
+    if now - deadline > interval:
+        deadline = now
+    return deadline
+
+def wait_until_ns(deadline, cancel):
+    """
+    Wait until perf_counter_ns() reaches 'deadline' (coarse wait, then spin).
+    Returns False as soon as 'cancel' (a threading.Event) is set.
+    """
+    clock = time.perf_counter_ns
+    while True:
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return not cancel.is_set()
+        if remaining > SPIN_THRESHOLD_NS:
+            if cancel.wait((remaining - SPIN_THRESHOLD_NS) / 1e9):
+                return False
+        elif cancel.is_set():
+            return False
+        else:
+            time.sleep(0)
+
+class ClickPlan:
+    """
+    Everything a channel needs per tick, precomputed from one config section.
+    Plans are never mutated: a config change builds a new plan and publishes it
+    with ClickEngine.set_plan(), a single reference swap. With a rate
+    'program' (programs.RateProgram) the intervals come from the program and
+    'interval_ns' is unused. With a click 'route' (routes.ClickRoute) every tick
+    clicks the route's next point instead of 'button'/'click_count'. 'batch' is
+    how many of the configured intervals one tick covers (see batched mode
+    in clicker.compile_plan); 'click_count' and 'interval_ns' already include it.
+    """
+    __slots__ = ('button', 'click_count', 'interval_ns', 'activation', 'program', 'route', 'batch')
+
+    def __init__(self, button, click_count, interval_ns, activation, program=None, route=None, batch=1):
+        self.button = button
+        self.click_count = click_count
+        self.interval_ns = interval_ns
+        self.activation = activation
+        self.program = program
+        self.route = route
+        self.batch = batch
+
+class Channel:
+    """One independently scheduled click source (a mouse button, a key, ...)."""
+
+    def __init__(self, name, index, inject, plan, inject_at=None):
+        self.name = name
+        self.index = index          # channel id in traces
+        self.inject = inject        # callable(button, count)
+        self.inject_at = inject_at  # callable(x, y, button, count), for routes
+        self.plan = plan
+        self.cursor = None      # ProgramCursor of the running activation, if the plan has a program
+        self.route_pos = 0      # next route point of the running activation
+        self.last_deadline = None  # deadline of the last tick of the running activation
+        self.cost_ns = 0        # average injection cost
+        self.lead_ns = 0        # how early injection starts: half the cost, capped at a quarter interval
+        self.active = False
+        self.generation = 0     # bumped on every start/stop; stale heap entries are dropped
+        self.stats = ChannelStats()
+
+class ClickEngine:
+    """
+    A single long-lived thread that serves every click channel from one
+    priority queue of (deadline_ns, generation, name) entries.
+
+    start()/stop() are idempotent and only flip state under the lock: a stopped
+    channel's pending entry is invalidated by its generation, so a fast toggle
+    can never leave two schedules running for the same channel.
+    """
+
+    def __init__(self):
+        self._channels = {}
+        self._heap = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._paused = False
+        self._active = 0        # running channels; the fine timer is held while any run
+        self.tracer = None  # clicktrace.ClickTracer recording every tick, when enabled
+
+    def add_channel(self, name, inject, plan, inject_at=None):
+        with self._cond:
+            self._channels[name] = Channel(name, len(self._channels), inject, plan, inject_at)
+
+    def set_plan(self, name, plan):
+        """
+        Publish 'plan' for channel 'name'. If the channel is running and its
+        timing changed, the pending tick is rescheduled from the last one
+        right away; a long old interval is never waited out.
+        """
+        with self._cond:
+            ch = self._channels[name]
+            old = ch.plan
+            if plan.program is not old.program:
+                ch.cursor = plan.program.cursor() if plan.program is not None else None
+            if plan.route is not old.route:
+                ch.route_pos = 0
+            ch.plan = plan
+            retimed = plan.program is not old.program or (plan.program is None and plan.interval_ns != old.interval_ns)
+            if ch.active and retimed and ch.last_deadline is not None:
+                interval = ch.cursor.next() if plan.program is not None else plan.interval_ns
+                ch.generation += 1
+                nxt = next_deadline(ch.last_deadline, interval, time.perf_counter_ns())
+                heapq.heappush(self._heap, (nxt, ch.generation, name))
+                self._cond.notify()
+
+    def names(self):
+        return list(self._channels)
+
+    def stats(self, name):
+        return self._channels[name].stats
+
+    def plan(self, name):
+        return self._channels[name].plan
+
+    def is_active(self, name):
+        return self._channels[name].active
+
+    def injection_cost_ns(self, name):
+        return self._channels[name].cost_ns
+
+    def start(self, name):
+        with self._cond:
+            ch = self._channels[name]
+            if ch.active:
+                return
+            ch.active = True
+            ch.generation += 1
+            self._active += 1
+            if self._active == 1:
+                fine_timer(True)
+            program = ch.plan.program
+            ch.cursor = program.cursor() if program is not None else None  # programs restart on every activation
+            ch.route_pos = 0
+            ch.last_deadline = None
+            heapq.heappush(self._heap, (time.perf_counter_ns(), ch.generation, name))
+            self._ensure_thread()
+            self._cond.notify()
+
+    def stop(self, name):
+        with self._cond:
+            ch = self._channels[name]
+            if not ch.active:
+                return
+            ch.active = False
+            ch.generation += 1
+            self._active -= 1
+            if self._active == 0:
+                fine_timer(False)
+            self._cond.notify()
+
+    def pause(self):
+        """Hold every channel without losing its active state (safety key)."""
+        with self._cond:
+            self._paused = True
+            self._cond.notify()
+
+    def resume(self):
+        """Resume every channel: overdue ticks fire now and their schedules restart from here."""
+        with self._cond:
+            self._paused = False
+            now = time.perf_counter_ns()
+            self._heap[:] = [(max(deadline, now), gen, name) for deadline, gen, name in self._heap]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="click-engine", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        heap = self._heap
+        channels = self._channels
+        clock = time.perf_counter_ns
+        while True:
+            with self._cond:
+                if not heap or self._paused:
+                    # Blocks without polling; start/stop/resume notify us
+                    self._cond.wait()
+                    continue
+                head = heap[0]
+                deadline, gen, name = head
+                ch = channels[name]
+                if ch.generation != gen:
+                    heapq.heappop(heap)
+                    continue
+                target = deadline - ch.lead_ns
+                remaining = target - clock()
+                if remaining > SPIN_THRESHOLD_NS:
+                    # Woken early by start/stop: re-evaluate the queue head
+                    self._cond.wait((remaining - SPIN_THRESHOLD_NS) / 1e9)
+                    continue
+
+            # Spin the last stretch outside the lock; sleep(0) releases the GIL
+            # so the listener threads stay responsive. Only this thread pops, so
+            # the heap cannot empty underneath us; a new head, a stop or a pause
+            # ends the spin at once.
+            while clock() < target and heap[0] is head and ch.generation == gen and not self._paused:
+                time.sleep(0)
+
+            with self._cond:
+                if heap[0] is not head or self._paused:
+                    continue
+                heapq.heappop(heap)
+                if ch.generation != gen:
+                    continue
+                ch.last_deadline = deadline
+
+            plan = ch.plan  # read once: a concurrent set_plan() applies from the next tick
+            route = plan.route
+            fired = clock()
+            if route is None:
+                ch.inject(plan.button, plan.click_count)
+                clicks = plan.click_count
+            else:
+                i = ch.route_pos
+                if i >= route.n:
+                    i = 0
+                ch.route_pos = i + 1
+                ch.inject_at(route.xs[i], route.ys[i], route.buttons[i], route.counts[i])
+                clicks = route.counts[i]
+            cost = clock() - fired
+            landed = fired + (cost >> 1)
+            ch.stats.record(landed - deadline, clicks)
+            tracer = self.tracer
+            if tracer is not None:
+                tracer.record(ch.index, deadline, landed)
+
+            cursor = ch.cursor
+            if cursor is not None and cursor.program is plan.program:
+                interval = cursor.next()
+            else:
+                interval = plan.interval_ns
+            ch.cost_ns += (cost - ch.cost_ns) >> COST_SMOOTHING
+            ch.lead_ns = min(ch.cost_ns >> 1, interval >> 2)
+
+            with self._cond:
+                if ch.generation == gen:
+                    nxt = next_deadline(deadline, interval, clock())
+                    heapq.heappush(heap, (nxt, gen, name))
@@ -0,0 +1,431 @@
+import tkinter as tk
+from tkinter import ttk
+import os
+import sys
+import time
+
+import clicker
+from clicker import (
+    cancel_listening, clear_bind, compile_binds, compile_plans, config, engine,
+    is_playing, is_recording, is_trigger_armed, save_config, toggle_left_clicker,
+    toggle_playback, toggle_recording, toggle_right_clicker, toggle_trigger,
+)
+from clicktrace import MARK_REDRAW
+from telemetry import hist_quantile
+from triggers import missing_module
+from ui_updates import CONFIG, LISTENING_DONE, STATE, STATS
+
+listening_popup = None
+
+root = tk.Tk()
+root.title("Auto Clicker v0.1")
+
+def resource_path(relative_path):
+    """ Get the absolute path to the resource, works for dev and for PyInstaller """
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+icon_path = resource_path("impl/icon.ico")
+
+root.iconbitmap(icon_path)
+root.resizable(False, False)
+
+def in_tk_window(x, y, window):
+    """Return True if (x,y) is inside 'window'."""
+    if not window or not window.winfo_exists():
+        return False
+    l = window.winfo_rootx()
+    t = window.winfo_rooty()
+    r = l + window.winfo_width()
+    b = t + window.winfo_height()
+    return (l <= x <= r) and (t <= y <= b)
+
+def start_listening(section, key='bind'):
+    global listening_popup
+    clicker.start_listening(section, key)
+
+    listening_popup = tk.Toplevel(root)
+    listening_popup.title("Listening...")
+    listening_popup.geometry("300x100")
+    lbl = tk.Label(listening_popup, text="Press a key or mouse button...\n(Press ESC to cancel)")
+    lbl.pack(pady=10)
+
+    btn_cancel = tk.Button(listening_popup, text="Cancel", command=cancel_listening)
+    btn_cancel.pack()
+
+def close_listening_popup():
+    global listening_popup
+    if listening_popup and listening_popup.winfo_exists():
+        listening_popup.destroy()
+        listening_popup = None
+
+def apply_changes(*_):
+    """
+    Immediately read all UI widgets into 'config' and save. 
+    `_` parameter is for event-handlers that pass extra args (ignored).
+    """
+    config['left_click']['mode'] = left_mode_var.get()
+    try:
+        config['left_click']['cps'] = int(left_cps_var.get())
+    except ValueError:
+        config['left_click']['cps'] = 10
+
+    try:
+        config['left_click']['delay'] = int(left_delay_var.get())
+    except ValueError:
+        config['left_click']['delay'] = 100
+
+    config['left_click']['click_type'] = left_click_type_var.get()
+    config['left_click']['activation'] = left_activation_var.get()
+    config['left_click']['program'] = left_program_var.get() or None
+    config['left_click']['route'] = left_route_var.get() or None
+
+    # Right
+    config['right_click']['mode'] = right_mode_var.get()
+    try:
+        config['right_click']['cps'] = int(right_cps_var.get())
+    except ValueError:
+        config['right_click']['cps'] = 5
+
+    try:
+        config['right_click']['delay'] = int(right_delay_var.get())
+    except ValueError:
+        config['right_click']['delay'] = 200
+
+    config['right_click']['click_type'] = right_click_type_var.get()
+    config['right_click']['activation'] = right_activation_var.get()
+    config['right_click']['program'] = right_program_var.get() or None
+    config['right_click']['route'] = right_route_var.get() or None
+
+    config['safety_key'] = safety_var.get()
+
+    compile_plans()
+    compile_binds()
+    save_config(config)
+    refresh_ui()
+
+# -- LEFT CLICK
+left_frame = ttk.LabelFrame(root, text="Left Click")
+left_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+
+left_mode_var = tk.StringVar(value=config['left_click']['mode'])
+left_cps_var = tk.StringVar(value=str(config['left_click']['cps']))
+left_delay_var = tk.StringVar(value=str(config['left_click']['delay']))
+left_bind_var = tk.StringVar(value=str(config['left_click']['bind'] or ''))
+left_click_type_var = tk.StringVar(value=config['left_click']['click_type'])
+left_activation_var = tk.StringVar(value=config['left_click']['activation'])
+left_program_var = tk.StringVar(value=config['left_click']['program'] or '')
+left_route_var = tk.StringVar(value=config['left_click']['route'] or '')
+
+tk.Label(left_frame, text="Mode:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+r_left_cps = ttk.Radiobutton(left_frame, text="CPS", variable=left_mode_var, value='cps', command=apply_changes)
+r_left_cps.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+r_left_delay = ttk.Radiobutton(left_frame, text="Delay(ms)", variable=left_mode_var, value='delay', command=apply_changes)
+r_left_delay.grid(row=0, column=2, padx=5, pady=5, sticky="w")
+
+tk.Label(left_frame, text="CPS:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+e_left_cps = tk.Entry(left_frame, textvariable=left_cps_var, width=6)
+e_left_cps.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+# When user finishes editing or leaves the field, apply changes
+e_left_cps.bind("<FocusOut>", apply_changes)
+e_left_cps.bind("<Return>", apply_changes)
+
+tk.Label(left_frame, text="Delay(ms):").grid(row=2, column=0, padx=5, pady=5, sticky="e")
+e_left_delay = tk.Entry(left_frame, textvariable=left_delay_var, width=6)
+e_left_delay.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+e_left_delay.bind("<FocusOut>", apply_changes)
+e_left_delay.bind("<Return>", apply_changes)
+
+tk.Label(left_frame, text="Bind:").grid(row=3, column=0, padx=5, pady=5, sticky="e")
+lbl_left_bind = tk.Label(left_frame, textvariable=left_bind_var, width=10, relief='sunken')
+lbl_left_bind.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+
+# Set Bind & Clear
+bind_buttons_left = tk.Frame(left_frame)
+bind_buttons_left.grid(row=3, column=2, padx=5, pady=5, sticky="w")
+
+ttk.Button(bind_buttons_left, text="Set Bind", command=lambda: start_listening('left_click')).grid(row=0, column=0, padx=2)
+ttk.Button(bind_buttons_left, text="Clear", command=lambda: clear_bind('left_click')).grid(row=0, column=1, padx=2)
+
+tk.Label(left_frame, text="Click Type:").grid(row=4, column=0, padx=5, pady=5, sticky="e")
+cb_left_type = ttk.Combobox(left_frame, textvariable=left_click_type_var, values=["single","double","triple"], state="readonly", width=7)
+cb_left_type.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+cb_left_type.bind("<<ComboboxSelected>>", apply_changes)
+
+tk.Label(left_frame, text="Activation:").grid(row=5, column=0, padx=5, pady=5, sticky="e")
+cb_left_activation = ttk.Combobox(left_frame, textvariable=left_activation_var, values=["toggle","hold"], state="readonly", width=7)
+cb_left_activation.grid(row=5, column=1, padx=5, pady=5, sticky="w")
+cb_left_activation.bind("<<ComboboxSelected>>", apply_changes)
+
+tk.Label(left_frame, text="Program:").grid(row=6, column=0, padx=5, pady=5, sticky="e")
+cb_left_program = ttk.Combobox(left_frame, textvariable=left_program_var, values=[""] + list(config['programs']), state="readonly", width=10)
+cb_left_program.grid(row=6, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+cb_left_program.bind("<<ComboboxSelected>>", apply_changes)
+
+tk.Label(left_frame, text="Route:").grid(row=7, column=0, padx=5, pady=5, sticky="e")
+cb_left_route = ttk.Combobox(left_frame, textvariable=left_route_var, values=[""] + list(config['routes']), state="readonly", width=10)
+cb_left_route.grid(row=7, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+cb_left_route.bind("<<ComboboxSelected>>", apply_changes)
+
+btn_left_toggle = ttk.Button(left_frame, text="Start Left", command=toggle_left_clicker)
+btn_left_toggle.grid(row=8, column=0, columnspan=3, pady=5)
+
+# -- RIGHT CLICK
+right_frame = ttk.LabelFrame(root, text="Right Click")
+right_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+
+right_mode_var = tk.StringVar(value=config['right_click']['mode'])
+right_cps_var = tk.StringVar(value=str(config['right_click']['cps']))
+right_delay_var = tk.StringVar(value=str(config['right_click']['delay']))
+right_bind_var = tk.StringVar(value=str(config['right_click']['bind'] or ''))
+right_click_type_var = tk.StringVar(value=config['right_click']['click_type'])
+right_activation_var = tk.StringVar(value=config['right_click']['activation'])
+right_program_var = tk.StringVar(value=config['right_click']['program'] or '')
+right_route_var = tk.StringVar(value=config['right_click']['route'] or '')
+
+tk.Label(right_frame, text="Mode:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+r_right_cps = ttk.Radiobutton(right_frame, text="CPS", variable=right_mode_var, value='cps', command=apply_changes)
+r_right_cps.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+r_right_delay = ttk.Radiobutton(right_frame, text="Delay(ms)", variable=right_mode_var, value='delay', command=apply_changes)
+r_right_delay.grid(row=0, column=2, padx=5, pady=5, sticky="w")
+
+tk.Label(right_frame, text="CPS:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+e_right_cps = tk.Entry(right_frame, textvariable=right_cps_var, width=6)
+e_right_cps.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+e_right_cps.bind("<FocusOut>", apply_changes)
+e_right_cps.bind("<Return>", apply_changes)
+
+tk.Label(right_frame, text="Delay(ms):").grid(row=2, column=0, padx=5, pady=5, sticky="e")
+e_right_delay = tk.Entry(right_frame, textvariable=right_delay_var, width=6)
+e_right_delay.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+e_right_delay.bind("<FocusOut>", apply_changes)
+e_right_delay.bind("<Return>", apply_changes)
+
+tk.Label(right_frame, text="Bind:").grid(row=3, column=0, padx=5, pady=5, sticky="e")
+lbl_right_bind = tk.Label(right_frame, textvariable=right_bind_var, width=10, relief='sunken')
+lbl_right_bind.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+
+bind_buttons_right = tk.Frame(right_frame)
+bind_buttons_right.grid(row=3, column=2, padx=5, pady=5, sticky="w")
+ttk.Button(bind_buttons_right, text="Set Bind", command=lambda: start_listening('right_click')).grid(row=0, column=0, padx=2)
+ttk.Button(bind_buttons_right, text="Clear", command=lambda: clear_bind('right_click')).grid(row=0, column=1, padx=2)
+
+tk.Label(right_frame, text="Click Type:").grid(row=4, column=0, padx=5, pady=5, sticky="e")
+cb_right_type = ttk.Combobox(right_frame, textvariable=right_click_type_var, values=["single","double","triple"], state="readonly", width=7)
+cb_right_type.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+cb_right_type.bind("<<ComboboxSelected>>", apply_changes)
+
+tk.Label(right_frame, text="Activation:").grid(row=5, column=0, padx=5, pady=5, sticky="e")
+cb_right_activation = ttk.Combobox(right_frame, textvariable=right_activation_var, values=["toggle","hold"], state="readonly", width=7)
+cb_right_activation.grid(row=5, column=1, padx=5, pady=5, sticky="w")
+cb_right_activation.bind("<<ComboboxSelected>>", apply_changes)
+
+tk.Label(right_frame, text="Program:").grid(row=6, column=0, padx=5, pady=5, sticky="e")
+cb_right_program = ttk.Combobox(right_frame, textvariable=right_program_var, values=[""] + list(config['programs']), state="readonly", width=10)
+cb_right_program.grid(row=6, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+cb_right_program.bind("<<ComboboxSelected>>", apply_changes)
+
+tk.Label(right_frame, text="Route:").grid(row=7, column=0, padx=5, pady=5, sticky="e")
+cb_right_route = ttk.Combobox(right_frame, textvariable=right_route_var, values=[""] + list(config['routes']), state="readonly", width=10)
+cb_right_route.grid(row=7, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+cb_right_route.bind("<<ComboboxSelected>>", apply_changes)
+
+btn_right_toggle = ttk.Button(right_frame, text="Start Right", command=toggle_right_clicker)
+btn_right_toggle.grid(row=8, column=0, columnspan=3, pady=5)
+
+# -- SAFETY KEY
+safety_frame = ttk.LabelFrame(root, text="Safety Key (Hold to Pause Clicking)")
+safety_frame.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
+
+safety_var = tk.StringVar(value=config['safety_key'])
+tk.Label(safety_frame, text="Safety Key:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+e_safety = tk.Entry(safety_frame, textvariable=safety_var, width=10)
+e_safety.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+e_safety.bind("<FocusOut>", apply_changes)
+e_safety.bind("<Return>", apply_changes)
+
+# -- MACRO
+macro_frame = ttk.LabelFrame(root, text="Macro")
+macro_frame.grid(row=3, column=0, padx=10, pady=10, sticky="nsew")
+
+record_bind_var = tk.StringVar(value=str(config['macro']['record_bind'] or ''))
+play_bind_var = tk.StringVar(value=str(config['macro']['play_bind'] or ''))
+
+tk.Label(macro_frame, text="Record Bind:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+lbl_record_bind = tk.Label(macro_frame, textvariable=record_bind_var, width=10, relief='sunken')
+lbl_record_bind.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+bind_buttons_record = tk.Frame(macro_frame)
+bind_buttons_record.grid(row=0, column=2, padx=5, pady=5, sticky="w")
+ttk.Button(bind_buttons_record, text="Set Bind", command=lambda: start_listening('macro', 'record_bind')).grid(row=0, column=0, padx=2)
+ttk.Button(bind_buttons_record, text="Clear", command=lambda: clear_bind('macro', 'record_bind')).grid(row=0, column=1, padx=2)
+
+tk.Label(macro_frame, text="Play Bind:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+lbl_play_bind = tk.Label(macro_frame, textvariable=play_bind_var, width=10, relief='sunken')
+lbl_play_bind.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+bind_buttons_play = tk.Frame(macro_frame)
+bind_buttons_play.grid(row=1, column=2, padx=5, pady=5, sticky="w")
+ttk.Button(bind_buttons_play, text="Set Bind", command=lambda: start_listening('macro', 'play_bind')).grid(row=0, column=0, padx=2)
+ttk.Button(bind_buttons_play, text="Clear", command=lambda: clear_bind('macro', 'play_bind')).grid(row=0, column=1, padx=2)
+
+btn_record = ttk.Button(macro_frame, text="Record", command=toggle_recording)
+btn_record.grid(row=2, column=0, columnspan=2, pady=5)
+btn_play = ttk.Button(macro_frame, text="Play", command=toggle_playback)
+btn_play.grid(row=2, column=2, pady=5)
+
+# -- PIXEL TRIGGER
+trigger_frame = ttk.LabelFrame(root, text="Pixel Trigger")
+trigger_frame.grid(row=4, column=0, padx=10, pady=10, sticky="nsew")
+
+trigger_bind_var = tk.StringVar(value=str(config['trigger']['bind'] or ''))
+
+tk.Label(trigger_frame, text="Bind:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+lbl_trigger_bind = tk.Label(trigger_frame, textvariable=trigger_bind_var, width=10, relief='sunken')
+lbl_trigger_bind.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+bind_buttons_trigger = tk.Frame(trigger_frame)
+bind_buttons_trigger.grid(row=0, column=2, padx=5, pady=5, sticky="w")
+ttk.Button(bind_buttons_trigger, text="Set Bind", command=lambda: start_listening('trigger', 'bind')).grid(row=0, column=0, padx=2)
+ttk.Button(bind_buttons_trigger, text="Clear", command=lambda: clear_bind('trigger', 'bind')).grid(row=0, column=1, padx=2)
+
+btn_trigger = ttk.Button(trigger_frame, text="Arm", command=toggle_trigger)
+btn_trigger.grid(row=1, column=0, columnspan=2, pady=5)
+btn_capture = ttk.Button(trigger_frame, text="Capture Reference", command=clicker.capture_trigger_reference)
+btn_capture.grid(row=1, column=2, pady=5)
+trigger_note_var = tk.StringVar(value="")
+tk.Label(trigger_frame, textvariable=trigger_note_var, fg="gray").grid(row=2, column=0, columnspan=3, padx=5, sticky="w")
+
+def update_trigger_source():
+    """Disable arming when the configured frame source cannot be created here."""
+    missing = missing_module(config['trigger']['source'])
+    for button in (btn_trigger, btn_capture):
+        button.state(['disabled'] if missing else ['!disabled'])
+    trigger_note_var.set(f"Screen capture needs {missing} (pip install {missing})" if missing else "")
+
+update_trigger_source()
+
+# -- STATS
+STATS_INTERVAL_MS = 500
+STATS_CHANNELS = (('left_click', "Left"), ('right_click', "Right"))
+
+stats_frame = ttk.LabelFrame(root, text="Stats")
+stats_frame.grid(row=5, column=0, padx=10, pady=10, sticky="nsew")
+
+stats_vars = {}
+for _row, (_channel, _label) in enumerate(STATS_CHANNELS):
+    tk.Label(stats_frame, text=f"{_label}:").grid(row=_row, column=0, padx=5, pady=2, sticky="e")
+    stats_vars[_channel] = tk.StringVar(value="-")
+    tk.Label(stats_frame, textvariable=stats_vars[_channel], anchor="w", width=36).grid(row=_row, column=1, padx=5, pady=2, sticky="w")
+
+_row = len(STATS_CHANNELS)
+tk.Label(stats_frame, text="Hooks:").grid(row=_row, column=0, padx=5, pady=2, sticky="e")
+hook_stats_var = tk.StringVar(value="-")
+tk.Label(stats_frame, textvariable=hook_stats_var, anchor="w", width=36).grid(row=_row, column=1, padx=5, pady=2, sticky="w")
+if clicker.tracer is not None:
+    ttk.Button(stats_frame, text="Dump Trace", command=clicker.dump_trace).grid(row=_row + 1, column=0, columnspan=2, pady=5)
+
+last_stats = {}  # channel -> (perf_counter, clicks) of the previous readout
+
+def update_stats():
+    now = time.perf_counter()
+    for channel, _ in STATS_CHANNELS:
+        snap = engine.stats(channel).snapshot()
+        prev_time, prev_clicks = last_stats.get(channel, (now, snap['clicks']))
+        cps = (snap['clicks'] - prev_clicks) / (now - prev_time) if now > prev_time else 0.0
+        last_stats[channel] = (now, snap['clicks'])
+        p99 = hist_quantile(snap['hist'], 0.99)
+        late = f"{p99 * 1e3:.2f} ms" if p99 is not None else "-"
+        stats_vars[channel].set(f"{snap['clicks']} clicks, {cps:.1f} CPS, p99 late < {late}")
+
+    hook_snap = clicker.hooks.snapshot().values()
+    hist = [sum(col) for col in zip(*(h['hist'] for h in hook_snap))]
+    p99 = hist_quantile(hist, 0.99)
+    worst = max(h['max_ns'] for h in hook_snap)
+    if p99 is not None:
+        hook_stats_var.set(f"callback p99 < {p99 * 1e6:.0f} us, max {worst / 1e3:.0f} us "
+                           f"(budget {clicker.hooks.budget_ns / 1e6:.0f} ms)")
+
+# -- Refresh UI: updates label text & toggle button text
+def refresh_ui():
+    left_bind_var.set(str(config['left_click']['bind'] or ''))
+    right_bind_var.set(str(config['right_click']['bind'] or ''))
+    record_bind_var.set(str(config['macro']['record_bind'] or ''))
+    play_bind_var.set(str(config['macro']['play_bind'] or ''))
+    trigger_bind_var.set(str(config['trigger']['bind'] or ''))
+
+    if engine.is_active('left_click'):
+        btn_left_toggle.config(text="Stop Left")
+    else:
+        btn_left_toggle.config(text="Start Left")
+
+    if engine.is_active('right_click'):
+        btn_right_toggle.config(text="Stop Right")
+    else:
+        btn_right_toggle.config(text="Start Right")
+
+    btn_record.config(text="Stop Recording" if is_recording() else "Record")
+    btn_play.config(text="Stop" if is_playing() else "Play")
+    btn_trigger.config(text="Disarm" if is_trigger_armed() else "Arm")
+
+# -- Reload widgets after config.yaml was edited outside the app
+SETTINGS_WIDGETS = (
+    ('left_click', left_mode_var, left_cps_var, left_delay_var, left_click_type_var,
+     left_activation_var, left_program_var, left_route_var, cb_left_program, cb_left_route),
+    ('right_click', right_mode_var, right_cps_var, right_delay_var, right_click_type_var,
+     right_activation_var, right_program_var, right_route_var, cb_right_program, cb_right_route),
+)
+
+def reload_settings():
+    for (section, mode_var, cps_var, delay_var, click_type_var, activation_var,
+         program_var, route_var, cb_program, cb_route) in SETTINGS_WIDGETS:
+        cfg = config[section]
+        mode_var.set(cfg['mode'])
+        cps_var.set(str(cfg['cps']))
+        delay_var.set(str(cfg['delay']))
+        click_type_var.set(cfg['click_type'])
+        activation_var.set(cfg['activation'])
+        program_var.set(cfg['program'] or '')
+        route_var.set(cfg['route'] or '')
+        cb_program.config(values=[""] + list(config['programs']))
+        cb_route.config(values=[""] + list(config['routes']))
+    safety_var.set(config['safety_key'])
+    update_trigger_source()
+
+# -- Update pump: the only place widgets change in response to other threads
+FRAME_MS = 16
+
+UI_HANDLERS = {
+    STATE: refresh_ui,
+    LISTENING_DONE: close_listening_popup,
+    STATS: update_stats,
+    CONFIG: reload_settings,
+}
+
+next_stats = 0.0
+
+def pump_updates():
+    global next_stats
+    now = time.perf_counter()
+    if now >= next_stats:
+        clicker.ui_updates.post(STATS)
+        next_stats = now + STATS_INTERVAL_MS / 1000
+    topics = clicker.ui_updates.drain()
+    if topics:
+        start = time.perf_counter_ns()
+        for topic in topics:
+            UI_HANDLERS[topic]()
+        if clicker.tracer is not None:
+            clicker.tracer.record(MARK_REDRAW, start, time.perf_counter_ns())
+    root.after(FRAME_MS, pump_updates)
+
+# Initial refresh
+refresh_ui()
+
+def run():
+    clicker.start_metrics_server()
+    clicker.start_control_server()
+    clicker.start_config_watcher()
+    clicker.start_listeners()
+    pump_updates()
+    root.mainloop()
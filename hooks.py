@@ -0,0 +1,121 @@
+"""
+Hook dispatch: keep the OS input hooks as short as possible.
+
+The backend calls the HookDispatcher methods from inside the low-level
+keyboard/mouse hooks. Each one only timestamps the event and puts a small
+tuple on a queue; a single dispatcher thread then runs the real handlers
+(bind matching, safety key, macro recording, bind capture, saving) in event
+order. On Windows a hook that overruns LowLevelHooksTimeout is silently
+unhooked, so every hook callback's duration is also recorded per hook
+thread, and the dispatcher warns when one gets near that budget.
+"""
+import queue
+import sys
+import threading
+import traceback
+from time import perf_counter_ns
+
+from telemetry import HookStats
+
+DEFAULT_BUDGET_MS = 300  # used when LowLevelHooksTimeout is not set (and off Windows)
+MAX_BUDGET_MS = 1000     # Windows 10 1709+ caps the timeout at one second
+WARN_FRACTION = 0.5      # warn once a callback takes this share of the budget
+WARN_INTERVAL_NS = 1_000_000_000
+
+def hook_budget_ns():
+    """How long the OS lets one low-level hook callback run."""
+    ms = DEFAULT_BUDGET_MS
+    if sys.platform == 'win32':
+        import winreg
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Control Panel\Desktop') as key:
+                ms = min(int(winreg.QueryValueEx(key, 'LowLevelHooksTimeout')[0]), MAX_BUDGET_MS)
+        except (OSError, ValueError):
+            pass
+    return ms * 1_000_000
+
+class HookDispatcher:
+    """
+    Hook-side entry points with the backend callback signatures. The
+    handlers receive the same arguments plus the event's perf_counter_ns()
+    timestamp, and run on the dispatcher thread.
+    """
+
+    def __init__(self, on_press, on_release, on_click, on_move, on_scroll):
+        self._on_press = on_press
+        self._on_release = on_release
+        self._on_click = on_click
+        self._on_move = on_move
+        self._on_scroll = on_scroll
+        self.budget_ns = hook_budget_ns()
+        self.warn_ns = int(self.budget_ns * WARN_FRACTION)
+        # One per hook thread, so each is only ever written by one thread
+        self.stats = {'keyboard': HookStats(), 'mouse': HookStats(), 'motion': HookStats()}
+        self._slowest = 0   # worst callback over warn_ns not yet reported
+        self._last_warning = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="hook-dispatch", daemon=True)
+        self._thread.start()
+
+    # -- Hook side: timestamp, enqueue, account; nothing else
+    def _done(self, stats, t):
+        duration = perf_counter_ns() - t
+        stats.record(duration)
+        if duration > self.warn_ns and duration > self._slowest:
+            self._slowest = duration
+
+    def press(self, token):
+        t = perf_counter_ns()
+        self._queue.put((self._on_press, (token, t)))
+        self._done(self.stats['keyboard'], t)
+
+    def release(self, token):
+        t = perf_counter_ns()
+        self._queue.put((self._on_release, (token, t)))
+        self._done(self.stats['keyboard'], t)
+
+    def click(self, x, y, token, pressed):
+        t = perf_counter_ns()
+        self._queue.put((self._on_click, (x, y, token, pressed, t)))
+        self._done(self.stats['mouse'], t)
+
+    def move(self, x, y):
+        t = perf_counter_ns()
+        self._queue.put((self._on_move, (x, y, t)))
+        self._done(self.stats['motion'], t)
+
+    def scroll(self, x, y, dx, dy):
+        t = perf_counter_ns()
+        self._queue.put((self._on_scroll, (x, y, dx, dy, t)))
+        self._done(self.stats['motion'], t)
+
+    # -- Dispatcher thread
+    def _run(self):
+        get = self._queue.get
+        while True:
+            handler, args = get()
+            try:
+                handler(*args)
+            except Exception:
+                traceback.print_exc()
+            if self._slowest:
+                self._warn()
+
+    def _warn(self):
+        now = perf_counter_ns()
+        if now - self._last_warning < WARN_INTERVAL_NS:
+            return
+        slowest, self._slowest = self._slowest, 0
+        self._last_warning = now
+        sys.stderr.write(f"Warning: an input hook callback took {slowest / 1e6:.1f} ms; "
+                         f"the OS drops hooks slower than {self.budget_ns / 1e6:.0f} ms\n")
+
+    def flush(self, timeout=None):
+        """Wait until every event queued so far has been handled."""
+        done = threading.Event()
+        self._queue.put((done.set, ()))
+        return done.wait(timeout)
+
+    def snapshot(self):
+        """{hook thread: callback duration stats}."""
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
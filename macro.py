@@ -0,0 +1,213 @@
+"""
+Macro recording and playback.
+
+Events are captured into a columnar chunk of preallocated arrays (time, a, b,
+token code, kind) instead of one Python object per event. Full chunks are
+handed to a writer thread that appends them to the macro file as blocks, and
+emptied chunks are recycled, so memory stays flat however long the recording
+runs.
+
+File layout (native byte order, recorded in the header):
+
+    header  MAGIC, byte order, padding                        16 bytes
+    block   uint32 n, uint32 pad, t[n] int64, a[n] int32,
+            b[n] int32, code[n] uint16, kind[n] uint8, pad to 8
+    ...
+    footer  JSON {"tokens": [...], "moves": bool}, uint64 length, END_MAGIC
+
+Playback memory-maps the file and reads each block's columns through
+zero-copy memoryview casts, firing every event on an absolute
+perf_counter_ns() deadline.
+"""
+import json
+import mmap
+import queue
+import struct
+import sys
+import threading
+import time
+from array import array
+
+from engine import fine_timer, wait_until_ns
+
+MAGIC = b'ACMACRO1'
+END_MAGIC = b'ACMACEND'
+HEADER = struct.Struct('=8sc7x')
+BLOCK_HEADER = struct.Struct('=II')
+FOOTER_TAIL = struct.Struct('=Q8s')
+
+KEY_DOWN, KEY_UP, BUTTON_DOWN, BUTTON_UP, MOVE, SCROLL = range(6)
+
+CHUNK_EVENTS = 4096
+
+class Chunk:
+    """One block worth of events, stored column by column."""
+    __slots__ = ('t', 'a', 'b', 'code', 'kind', 'n')
+
+    def __init__(self, size=CHUNK_EVENTS):
+        self.t = array('q', bytes(8 * size))
+        self.a = array('i', bytes(4 * size))
+        self.b = array('i', bytes(4 * size))
+        self.code = array('H', bytes(2 * size))
+        self.kind = array('B', bytes(size))
+        self.n = 0
+
+    def write_to(self, f):
+        n = self.n
+        f.write(BLOCK_HEADER.pack(n, 0))
+        for column in (self.t, self.a, self.b, self.code, self.kind):
+            f.write(memoryview(column)[:n])
+        size = BLOCK_HEADER.size + 19 * n
+        f.write(bytes(-size % 8))
+
+class MacroRecorder:
+    """
+    Streams events to 'path' until stop(). append() may be called from any
+    listener thread; it only stores into the current chunk.
+    """
+
+    def __init__(self, path, moves=True):
+        self.path = path
+        self.moves = moves
+        self.tokens = []
+        self._codes = {}
+        self._lock = threading.Lock()
+        self._chunk = Chunk()
+        self._closed = False
+        self._free = queue.SimpleQueue()
+        self._full = queue.SimpleQueue()
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, sys.byteorder[0].encode()))
+        self._writer = threading.Thread(target=self._write_loop, name="macro-writer", daemon=True)
+        self._writer.start()
+        self.start_ns = time.perf_counter_ns()
+
+    def code(self, token):
+        code = self._codes.get(token)
+        if code is None:
+            code = self._codes[token] = len(self.tokens)
+            self.tokens.append(token)
+        return code
+
+    def append(self, kind, token=None, a=0, b=0, t=None):
+        """Record an event that happened at perf_counter_ns() 't' (default: now)."""
+        t = (time.perf_counter_ns() if t is None else t) - self.start_ns
+        with self._lock:
+            if self._closed:
+                return
+            chunk = self._chunk
+            n = chunk.n
+            chunk.t[n] = t
+            chunk.a[n] = a
+            chunk.b[n] = b
+            chunk.code[n] = 0 if token is None else self.code(token)
+            chunk.kind[n] = kind
+            chunk.n = n + 1
+            if chunk.n == CHUNK_EVENTS:
+                self._full.put(chunk)
+                try:
+                    self._chunk = self._free.get_nowait()
+                except queue.Empty:
+                    self._chunk = Chunk()
+
+    def _write_loop(self):
+        while True:
+            chunk = self._full.get()
+            if chunk is None:
+                return
+            chunk.write_to(self._file)
+            chunk.n = 0
+            self._free.put(chunk)
+
+    def stop(self):
+        """Flush the last partial chunk, write the footer and close the file."""
+        with self._lock:
+            self._closed = True
+            if self._chunk.n:
+                self._full.put(self._chunk)
+        self._full.put(None)
+        self._writer.join()
+        footer = json.dumps({'tokens': self.tokens, 'moves': self.moves}).encode('utf-8')
+        self._file.write(footer)
+        self._file.write(FOOTER_TAIL.pack(len(footer), END_MAGIC))
+        self._file.close()
+
+class MacroFile:
+    """Read-only, memory-mapped view of a recorded macro."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        magic, order = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a macro file")
+        if order != sys.byteorder[0].encode():
+            raise ValueError(f"{path} was recorded with a different byte order")
+        footer_len, end = FOOTER_TAIL.unpack_from(mm, len(mm) - FOOTER_TAIL.size)
+        if end != END_MAGIC:
+            raise ValueError(f"{path} is incomplete (recording was not stopped)")
+        self._blocks_end = len(mm) - FOOTER_TAIL.size - footer_len
+        meta = json.loads(mm[self._blocks_end:self._blocks_end + footer_len])
+        self.tokens = meta['tokens']
+        self.moves = meta['moves']
+
+    def blocks(self):
+        """Yield (n, t, a, b, code, kind) column views for every block."""
+        view = memoryview(self._mm)
+        off = HEADER.size
+        while off < self._blocks_end:
+            n, _ = BLOCK_HEADER.unpack_from(view, off)
+            off += BLOCK_HEADER.size
+            columns = []
+            for fmt, width in (('q', 8), ('i', 4), ('i', 4), ('H', 2), ('B', 1)):
+                columns.append(view[off:off + width * n].cast(fmt))
+                off += width * n
+            off += -(BLOCK_HEADER.size + 19 * n) % 8
+            yield (n, *columns)
+
+    def close(self):
+        self._mm.close()
+
+def play(path, backend, cancel):
+    """
+    Replay the macro at 'path' through 'backend' on absolute deadlines from
+    now. Returns False if 'cancel' (a threading.Event) stopped it early.
+    """
+    macro = MacroFile(path)
+    fine_timer(True)
+    try:
+        return _play_blocks(macro, backend, cancel)
+    finally:
+        fine_timer(False)
+        try:
+            macro.close()
+        except BufferError:
+            pass  # a traceback still holds a column view; the map closes with it
+
+def _play_blocks(macro, backend, cancel):
+    tokens = macro.tokens
+    press_button = backend.press_button
+    release_button = backend.release_button
+    move = backend.move
+    start = time.perf_counter_ns()
+    for n, t, a, b, code, kind in macro.blocks():
+        for i in range(n):
+            if not wait_until_ns(start + t[i], cancel):
+                return False
+            k = kind[i]
+            if k == MOVE:
+                move(a[i], b[i])
+            elif k == KEY_DOWN:
+                backend.press_key(tokens[code[i]])
+            elif k == KEY_UP:
+                backend.release_key(tokens[code[i]])
+            elif k == BUTTON_DOWN:
+                if not macro.moves:
+                    move(a[i], b[i])
+                press_button(tokens[code[i]])
+            elif k == BUTTON_UP:
+                release_button(tokens[code[i]])
+            elif k == SCROLL:
+                backend.scroll(a[i], b[i])
+    return True
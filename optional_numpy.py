@@ -0,0 +1,22 @@
+"""
+NumPy, imported on first use.
+
+Rate programs and pixel triggers vectorize with NumPy when it is installed
+(pip install numpy) and fall back to plain loops otherwise. Importing it
+takes tens of milliseconds, so it happens when the first program or trigger
+needs it, never during 'import clicker'.
+"""
+module = None
+checked = False
+
+def load():
+    """The numpy module, or None if it is not installed."""
+    global module, checked
+    if not checked:
+        try:
+            import numpy
+            module = numpy
+        except ImportError:
+            pass
+        checked = True
+    return module
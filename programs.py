@@ -0,0 +1,290 @@
+"""
+Rate programs: click intervals that follow a ramp, a burst/rest cycle or a
+random distribution instead of one constant.
+
+A program is turned into intervals (ns) in bulk, CHUNK at a time, into
+preallocated arrays: vectorized with NumPy when it is installed, with a
+plain loop otherwise. The engine only indexes into the current chunk; the
+next one is generated on a prefetch thread while the current one is half
+used, and swapped in when it runs out. So a click costs no RNG or math, the
+engine thread never generates, and memory stays bounded however long the
+program runs. The plain loops release the GIL every SLICE intervals so the
+prefetch thread never holds up the engine for long.
+
+Program specs (config['programs'][name]):
+
+    {type: ramp, start_cps: 5, end_cps: 50, duration: 10,
+     curve: linear|exponential, then: hold|repeat}
+    {type: burst, cps: 20, clicks: 10, rest_ms: 500}
+    {type: random, distribution: uniform|normal|lognormal|exponential,
+     mean_ms: 100, spread_ms: 15, seed: 1234}
+"""
+import math
+import queue
+import random
+import threading
+import time
+from array import array
+
+from optional_numpy import load as load_numpy
+
+CHUNK = 4096
+SLICE = 128     # intervals between GIL releases in the plain-loop generators
+MIN_INTERVAL_NS = 100_000
+MAX_INTERVAL_NS = 86_400 * 10**9   # a day
+
+DISTRIBUTIONS = ('uniform', 'normal', 'lognormal', 'exponential')
+
+def _positive(spec, key):
+    try:
+        value = float(spec[key])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"'{key}' must be a number")
+    if not 0 < value < math.inf:
+        raise ValueError(f"'{key}' must be positive and finite")
+    return value
+
+def _interval(ns, what):
+    if ns > MAX_INTERVAL_NS:
+        raise ValueError(f"{what} is longer than a day")
+    return int(ns)
+
+class RateProgram:
+    """A validated program spec that can generate any chunk of its intervals."""
+
+    def __init__(self, spec):
+        self.kind = spec.get('type')
+        if self.kind == 'ramp':
+            self.c0 = _positive(spec, 'start_cps')
+            self.c1 = _positive(spec, 'end_cps')
+            _interval(1e9 / min(self.c0, self.c1), "the slowest interval")
+            self.duration = _positive(spec, 'duration')
+            self.curve = spec.get('curve', 'linear')
+            self.then = spec.get('then', 'hold')
+            if self.curve not in ('linear', 'exponential'):
+                raise ValueError("'curve' must be linear or exponential")
+            if self.then not in ('hold', 'repeat'):
+                raise ValueError("'then' must be hold or repeat")
+            # Clicks in one pass of the ramp: integral of cps over the duration
+            if self.curve == 'linear':
+                total = (self.c0 + self.c1) / 2 * self.duration
+            else:
+                total = self._exp_clicks(self.duration)
+            self.ramp_clicks = max(1, int(total))
+            self.ramp_chunks = -(-self.ramp_clicks // CHUNK)
+        elif self.kind == 'burst':
+            self.base_ns = _interval(1e9 / _positive(spec, 'cps'), "the click interval")
+            self.period = int(_positive(spec, 'clicks'))
+            if self.period < 1:
+                raise ValueError("'clicks' must be at least 1")
+            self.rest_ns = _interval(_positive(spec, 'rest_ms') * 1e6, "'rest_ms'")
+        elif self.kind == 'random':
+            self.distribution = spec.get('distribution', 'normal')
+            if self.distribution not in DISTRIBUTIONS:
+                raise ValueError(f"'distribution' must be one of {', '.join(DISTRIBUTIONS)}")
+            self.mean = _interval(_positive(spec, 'mean_ms') * 1e6, "'mean_ms'")
+            try:
+                self.spread = float(spec.get('spread_ms') or 0) * 1e6
+            except (TypeError, ValueError):
+                raise ValueError("'spread_ms' must be a number")
+            if not 0 <= self.spread < math.inf:
+                raise ValueError("'spread_ms' must be non-negative and finite")
+            seed = spec.get('seed')
+            self.seed = int(seed) if seed is not None else random.randrange(1 << 31)
+        else:
+            raise ValueError("'type' must be ramp, burst or random")
+
+        self.first = array('q', bytes(8 * CHUNK))
+        self.first_n = self.generate(0, self.first)
+        prefetch_jobs()     # start the thread now, not on the engine thread
+
+    def cursor(self):
+        return ProgramCursor(self)
+
+    # -- Ramp: click k fires at t(k), the inverse of the click count N(t)
+    def _exp_clicks(self, t):
+        g = math.log(self.c1 / self.c0) / self.duration
+        if g == 0:
+            return self.c0 * t
+        return self.c0 / g * math.expm1(g * t)
+
+    def _ramp_times(self, ks):
+        """Seconds from the ramp start to clicks 'ks' (NumPy array or list)."""
+        np = load_numpy()
+        c0, c1, T = self.c0, self.c1, self.duration
+        if self.curve == 'linear':
+            a = (c1 - c0) / T
+            if a == 0:
+                return ks / c0 if np is not None else [k / c0 for k in ks]
+            if np is not None:
+                return (np.sqrt(c0 * c0 + 2 * a * ks) - c0) / a
+            return [(math.sqrt(c0 * c0 + 2 * a * k) - c0) / a for k in ks]
+        g = math.log(c1 / c0) / T
+        if g == 0:
+            return ks / c0 if np is not None else [k / c0 for k in ks]
+        if np is not None:
+            return np.log1p(g * ks / c0) / g
+        return [math.log1p(g * k / c0) / g for k in ks]
+
+    def generate(self, index, out):
+        """Fill 'out' with the intervals (ns) of chunk 'index'; returns how many."""
+        if self.kind == 'ramp':
+            return self._generate_ramp(index, out)
+        if self.kind == 'burst':
+            return self._generate_burst(index, out)
+        return self._generate_random(index, out)
+
+    def _generate_ramp(self, index, out):
+        np = load_numpy()
+        if index >= self.ramp_chunks:
+            if self.then == 'repeat':
+                index %= self.ramp_chunks
+            else:
+                interval = max(MIN_INTERVAL_NS, int(1e9 / self.c1))
+                if np is not None:
+                    np.frombuffer(out, dtype=np.int64)[:] = interval
+                else:
+                    out[:] = array('q', [interval]) * len(out)
+                return len(out)
+        lo = index * CHUNK
+        hi = min(lo + CHUNK, self.ramp_clicks)
+        n = hi - lo
+        if np is not None:
+            t = self._ramp_times(np.arange(lo, hi + 1, dtype=np.float64))
+            view = np.frombuffer(out, dtype=np.int64)[:n]
+            view[:] = np.maximum(MIN_INTERVAL_NS, np.diff(t) * 1e9)
+        else:
+            for a in range(0, n, SLICE):
+                b = min(n, a + SLICE)
+                t = self._ramp_times(range(lo + a, lo + b + 1))
+                for i in range(b - a):
+                    out[a + i] = max(MIN_INTERVAL_NS, int((t[i + 1] - t[i]) * 1e9))
+                time.sleep(0)
+        return n
+
+    def _generate_burst(self, index, out):
+        np = load_numpy()
+        offset = index * len(out) % self.period
+        if np is not None:
+            pos = (np.arange(len(out)) + offset) % self.period
+            np.frombuffer(out, dtype=np.int64)[:] = np.where(pos == self.period - 1, self.rest_ns, self.base_ns)
+        else:
+            last = self.period - 1
+            for i in range(len(out)):
+                out[i] = self.rest_ns if (i + offset) % self.period == last else self.base_ns
+                if not i % SLICE:
+                    time.sleep(0)
+        return len(out)
+
+    def _generate_random(self, index, out):
+        np = load_numpy()
+        # Seeded per chunk, so any chunk can be generated independently
+        seed = (self.seed << 32) + index
+        m, s, n = self.mean, self.spread, len(out)
+        dist = self.distribution
+        if dist == 'lognormal':
+            sigma2 = math.log1p((s / m) ** 2)
+            mu, sigma = math.log(m) - sigma2 / 2, math.sqrt(sigma2)
+        if np is not None:
+            rng = np.random.default_rng(seed)
+            if dist == 'uniform':
+                values = rng.uniform(m - s, m + s, n)
+            elif dist == 'normal':
+                values = rng.normal(m, s, n)
+            elif dist == 'lognormal':
+                values = rng.lognormal(mu, sigma, n)
+            else:
+                values = rng.exponential(m, n)
+            np.frombuffer(out, dtype=np.int64)[:] = np.clip(values, MIN_INTERVAL_NS, MAX_INTERVAL_NS)
+        else:
+            rng = random.Random(seed)
+            if dist == 'uniform':
+                draw = lambda: rng.uniform(m - s, m + s)
+            elif dist == 'normal':
+                draw = lambda: rng.gauss(m, s)
+            elif dist == 'lognormal':
+                draw = lambda: rng.lognormvariate(mu, sigma)
+            else:
+                draw = lambda: rng.expovariate(1 / m)
+            for i in range(n):
+                out[i] = min(MAX_INTERVAL_NS, max(MIN_INTERVAL_NS, int(draw())))
+                if not i % SLICE:
+                    time.sleep(0)
+        return n
+
+class Prefetch:
+    """One chunk being generated on the prefetch thread; 'done' is set when 'out' holds 'n' intervals."""
+    __slots__ = ('program', 'index', 'out', 'n', 'done')
+
+    def __init__(self, program, index, out):
+        self.program = program
+        self.index = index
+        self.out = out
+        self.n = 0
+        self.done = threading.Event()
+
+prefetch_queue = None       # SimpleQueue of Prefetch jobs, created with the thread on first use
+prefetch_lock = threading.Lock()
+
+def prefetch_thread(jobs):
+    while True:
+        job = jobs.get()
+        job.n = job.program.generate(job.index, job.out)
+        job.done.set()
+
+def prefetch_jobs():
+    """The prefetch thread's job queue, starting the thread on first use."""
+    global prefetch_queue
+    if prefetch_queue is None:
+        with prefetch_lock:
+            if prefetch_queue is None:
+                jobs = queue.SimpleQueue()
+                threading.Thread(target=prefetch_thread, args=(jobs,), name="program-prefetch", daemon=True).start()
+                prefetch_queue = jobs
+    return prefetch_queue
+
+def prefetch(program, index, out):
+    """Queue chunk 'index' of 'program' to be generated into 'out'; returns the Prefetch."""
+    job = Prefetch(program, index, out)
+    prefetch_jobs().put(job)
+    return job
+
+class ProgramCursor:
+    """Per-activation read position in a program; owned by the engine thread."""
+    __slots__ = ('program', 'index', 'data', 'n', 'pos', 'half', 'ahead', 'spare')
+
+    def __init__(self, program):
+        self.program = program
+        self.index = 0
+        self.data = program.first   # chunk 0 is shared by every cursor of the program
+        self.n = program.first_n
+        self.pos = 0
+        self.half = self.n // 2
+        self.ahead = None           # Prefetch of chunk index + 1, once requested
+        self.spare = None           # our buffer that 'data' is not using
+
+    def next(self):
+        pos = self.pos
+        if pos == self.half:
+            self._request()
+        elif pos == self.n:
+            self._advance()
+            pos = 0
+        self.pos = pos + 1
+        return self.data[pos]
+
+    def _request(self):
+        if self.ahead is None:
+            out = self.spare if self.spare is not None else array('q', bytes(8 * CHUNK))
+            self.spare = None
+            self.ahead = prefetch(self.program, self.index + 1, out)
+
+    def _advance(self):
+        self._request()
+        ahead, self.ahead = self.ahead, None
+        ahead.done.wait()   # only blocks if the prefetch thread fell half a chunk behind
+        if self.data is not self.program.first:
+            self.spare = self.data
+        self.data, self.n = ahead.out, ahead.n
+        self.index = ahead.index
+        self.half = self.n // 2
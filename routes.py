@@ -0,0 +1,111 @@
+"""
+Click routes: a list of screen points the clicker visits one per tick,
+moving the pointer there and then clicking (backend click_at).
+
+Route specs (config['routes'][name]):
+
+    {points: [[100, 200], [300, 200, right], [300, 400, left, 2]],
+     order: as_is|nearest|2opt, button: left, clicks: 1}
+
+A point is [x, y], [x, y, button] or [x, y, button, clicks] (or a mapping
+with those keys); 'button'/'clicks' give the defaults. The route loops, so
+'nearest' and '2opt' reorder the points to shorten the closed tour the
+cursor travels. The order is computed once when the route is compiled.
+"""
+import math
+from array import array
+
+from backends import MOUSE_BUTTONS
+
+ORDERS = ('as_is', 'nearest', '2opt')
+MAX_2OPT_PASSES = 50
+MAX_CLICKS = 0xFFFF         # per point, the range of the 'counts' column
+COORD_LIMIT = 1 << 31       # |x|, |y| must fit the int32 'xs'/'ys' columns
+
+def _point(raw, button, clicks):
+    if isinstance(raw, dict):
+        raw = [raw.get('x'), raw.get('y'), raw.get('button', button), raw.get('clicks', clicks)]
+    if not isinstance(raw, (list, tuple)) or not 2 <= len(raw) <= 4:
+        raise ValueError(f"bad point {raw!r}")
+    raw = list(raw) + [button, clicks][len(raw) - 2:]
+    try:
+        x, y, n = int(raw[0]), int(raw[1]), int(raw[3])
+    except (TypeError, ValueError):
+        raise ValueError(f"bad point {raw!r}")
+    b = str(raw[2]).lower()
+    if b not in MOUSE_BUTTONS:
+        raise ValueError(f"unknown button {raw[2]!r}")
+    if not 1 <= n <= MAX_CLICKS:
+        raise ValueError(f"bad click count in {raw!r}")
+    if not (-COORD_LIMIT <= x < COORD_LIMIT and -COORD_LIMIT <= y < COORD_LIMIT):
+        raise ValueError(f"point out of range {raw!r}")
+    return x, y, b, n
+
+def tour_length(xs, ys, order):
+    """Length of the closed tour visiting the points in 'order'."""
+    total = 0.0
+    prev = order[-1]
+    for i in order:
+        total += math.hypot(xs[i] - xs[prev], ys[i] - ys[prev])
+        prev = i
+    return total
+
+def nearest_neighbour(xs, ys):
+    """Greedy tour from the first point: always go to the closest unvisited one."""
+    n = len(xs)
+    order = [0]
+    left = set(range(1, n))
+    while left:
+        cx, cy = xs[order[-1]], ys[order[-1]]
+        nxt = min(left, key=lambda j: (xs[j] - cx) ** 2 + (ys[j] - cy) ** 2)
+        order.append(nxt)
+        left.remove(nxt)
+    return order
+
+def two_opt(xs, ys, order):
+    """Improve a closed tour by reversing segments while that shortens it."""
+    order = list(order)
+    n = len(order)
+    dist = lambda a, b: math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+    for _ in range(MAX_2OPT_PASSES):
+        improved = False
+        for i in range(n - 1):
+            a, b = order[i], order[i + 1]
+            for j in range(i + 2, n if i else n - 1):
+                c, d = order[j], order[(j + 1) % n]
+                if dist(a, c) + dist(b, d) < dist(a, b) + dist(c, d) - 1e-9:
+                    order[i + 1:j + 1] = reversed(order[i + 1:j + 1])
+                    a, b = order[i], order[i + 1]
+                    improved = True
+        if not improved:
+            break
+    return order
+
+class ClickRoute:
+    """A validated route with its points stored column-wise in visiting order."""
+
+    def __init__(self, spec):
+        button = str(spec.get('button', 'left')).lower()
+        clicks = spec.get('clicks', 1)
+        raw = spec.get('points')
+        if not isinstance(raw, (list, tuple)) or not raw:
+            raise ValueError("'points' must be a non-empty list")
+        points = [_point(p, button, clicks) for p in raw]
+        self.order_mode = spec.get('order', 'as_is')
+        if self.order_mode not in ORDERS:
+            raise ValueError(f"'order' must be one of {', '.join(ORDERS)}")
+
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        order = list(range(len(points)))
+        if self.order_mode != 'as_is' and len(points) > 3:
+            order = nearest_neighbour(xs, ys)
+            if self.order_mode == '2opt':
+                order = two_opt(xs, ys, order)
+
+        self.n = len(points)
+        self.xs = array('i', (xs[i] for i in order))
+        self.ys = array('i', (ys[i] for i in order))
+        self.buttons = tuple(points[i][2] for i in order)
+        self.counts = array('H', (points[i][3] for i in order))
+        self.length = tour_length(xs, ys, order)
@@ -0,0 +1,154 @@
+"""
+Live click telemetry: per-channel counters and a lateness histogram, plus an
+optional localhost endpoint serving them as Prometheus text or JSON.
+
+Only the engine thread writes a channel's stats, so the counters need no
+lock; they live in preallocated arrays that are updated in place. Readers
+(the GUI, the endpoint) see each value atomically but may see counters from
+slightly different moments, which is fine for monitoring.
+"""
+import json
+import threading
+from array import array
+
+# Lateness buckets: bucket k holds lateness < 2**k * 1024 ns (~2**k us), the
+# last bucket catches everything slower.
+BUCKETS = 24
+BUCKET_BOUNDS_S = [(1 << (k + 10)) / 1e9 for k in range(BUCKETS - 1)] + [float('inf')]
+
+CLICKS, TICKS, LATE_SUM_NS, LATE_MAX_NS = range(4)
+
+class ChannelStats:
+    __slots__ = ('counters', 'hist')
+
+    def __init__(self):
+        self.counters = array('q', bytes(8 * 4))
+        self.hist = array('q', bytes(8 * BUCKETS))
+
+    def record(self, late_ns, clicks):
+        """Account one tick that fired 'late_ns' after its deadline."""
+        c = self.counters
+        c[CLICKS] += clicks
+        c[TICKS] += 1
+        if late_ns < 0:
+            late_ns = 0
+        c[LATE_SUM_NS] += late_ns
+        if late_ns > c[LATE_MAX_NS]:
+            c[LATE_MAX_NS] = late_ns
+        self.hist[min(BUCKETS - 1, (late_ns >> 10).bit_length())] += 1
+
+    def snapshot(self):
+        c = self.counters
+        return {
+            'clicks': c[CLICKS],
+            'ticks': c[TICKS],
+            'late_sum_ns': c[LATE_SUM_NS],
+            'late_max_ns': c[LATE_MAX_NS],
+            'hist': list(self.hist),
+        }
+
+class HookStats:
+    """Duration distribution of one hook thread's callbacks (same buckets as lateness)."""
+    __slots__ = ('counters', 'hist')
+
+    def __init__(self):
+        self.counters = array('q', bytes(8 * 3))
+        self.hist = array('q', bytes(8 * BUCKETS))
+
+    def record(self, duration_ns):
+        c = self.counters
+        c[0] += 1
+        c[1] += duration_ns
+        if duration_ns > c[2]:
+            c[2] = duration_ns
+        self.hist[min(BUCKETS - 1, (duration_ns >> 10).bit_length())] += 1
+
+    def snapshot(self):
+        c = self.counters
+        return {'calls': c[0], 'sum_ns': c[1], 'max_ns': c[2], 'hist': list(self.hist)}
+
+def hist_quantile(hist, q):
+    """Upper bound (seconds) of the bucket holding quantile 'q', None without data."""
+    total = sum(hist)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for k, n in enumerate(hist):
+        seen += n
+        if seen >= rank:
+            return BUCKET_BOUNDS_S[k]
+    return BUCKET_BOUNDS_S[-1]
+
+def snapshot(engine):
+    """{channel: stats dict (plus 'active')} for every engine channel."""
+    result = {}
+    for name in engine.names():
+        snap = engine.stats(name).snapshot()
+        snap['active'] = engine.is_active(name)
+        result[name] = snap
+    return result
+
+def format_prometheus(snap):
+    lines = [
+        '# HELP autoclicker_clicks_total Clicks injected per channel.',
+        '# TYPE autoclicker_clicks_total counter',
+    ]
+    lines += [f'autoclicker_clicks_total{{channel="{ch}"}} {s["clicks"]}' for ch, s in snap.items()]
+    lines += ['# HELP autoclicker_ticks_total Scheduler ticks fired per channel.',
+              '# TYPE autoclicker_ticks_total counter']
+    lines += [f'autoclicker_ticks_total{{channel="{ch}"}} {s["ticks"]}' for ch, s in snap.items()]
+    lines += ['# HELP autoclicker_active Whether the channel is clicking.',
+              '# TYPE autoclicker_active gauge']
+    lines += [f'autoclicker_active{{channel="{ch}"}} {int(s["active"])}' for ch, s in snap.items()]
+    lines += ['# HELP autoclicker_lateness_max_seconds Worst tick lateness.',
+              '# TYPE autoclicker_lateness_max_seconds gauge']
+    lines += [f'autoclicker_lateness_max_seconds{{channel="{ch}"}} {s["late_max_ns"] / 1e9}' for ch, s in snap.items()]
+    lines += ['# HELP autoclicker_lateness_seconds How late each tick fired after its deadline.',
+              '# TYPE autoclicker_lateness_seconds histogram']
+    for ch, s in snap.items():
+        cumulative = 0
+        for bound, n in zip(BUCKET_BOUNDS_S, s['hist']):
+            cumulative += n
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'autoclicker_lateness_seconds_bucket{{channel="{ch}",le="{le}"}} {cumulative}')
+        lines.append(f'autoclicker_lateness_seconds_sum{{channel="{ch}"}} {s["late_sum_ns"] / 1e9}')
+        lines.append(f'autoclicker_lateness_seconds_count{{channel="{ch}"}} {s["ticks"]}')
+    return '\n'.join(lines) + '\n'
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text) and /metrics.json on 127.0.0.1."""
+
+    def __init__(self, engine, port):
+        # Imported here: the endpoint is off by default and http.server is slow to import
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                snap = snapshot(engine)
+                if self.path == '/metrics':
+                    body = format_prometheus(snap).encode('utf-8')
+                    ctype = 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(snap).encode('utf-8')
+                    ctype = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
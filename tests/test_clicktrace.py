@@ -0,0 +1,43 @@
+"""Click traces: the ring buffer, the dump file and the analysis of a loaded dump."""
+import pytest
+
+from clicktrace import MARK_GC, ClickTracer, analyze, load_trace
+
+def test_dump_round_trip_keeps_the_newest_records_oldest_first(tmp_path):
+    tracer = ClickTracer(['left_click', 'right_click'], capacity=8)
+    for i in range(11):
+        tracer.record(i % 2, i * 100, i * 100 + 5)
+    path = str(tmp_path / 'trace.bin')
+    assert tracer.dump(path) == 8
+    start, end, ids, channels = load_trace(path)
+    assert list(start) == [i * 100 for i in range(3, 11)]
+    assert list(end) == [i * 100 + 5 for i in range(3, 11)]
+    assert list(ids) == [i % 2 for i in range(3, 11)]
+    assert channels == ['left_click', 'right_click']
+
+def test_partial_ring_round_trip(tmp_path):
+    tracer = ClickTracer(['left_click'], capacity=8)
+    tracer.record(0, 1, 2)
+    path = str(tmp_path / 'trace.bin')
+    assert tracer.dump(path) == 1
+    assert [list(col) for col in load_trace(path)[:3]] == [[1], [2], [0]]
+
+def test_analyze_blames_overlapping_markers(tmp_path):
+    tracer = ClickTracer(['left_click'], capacity=64)
+    for i in range(10):
+        tracer.record(0, i * 10_000_000, i * 10_000_000 + 50_000)
+    tracer.record(MARK_GC, 49_000_000, 54_000_000)
+    tracer.record(0, 50_000_000, 53_000_000)   # 3 ms late during the collection
+    path = str(tmp_path / 'trace.bin')
+    tracer.dump(path)
+    report = analyze(*load_trace(path), threshold_ns=1_000_000)
+    assert report['channels']['left_click']['clicks'] == 11
+    assert report['channels']['left_click']['late_max_us'] == pytest.approx(3000)
+    assert report['markers']['gc']['count'] == 1
+    assert [(o['late_us'], o['during']) for o in report['outliers']] == [(3000, ['gc'])]
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / 'trace.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        load_trace(str(path))
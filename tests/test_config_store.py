@@ -0,0 +1,97 @@
+"""merge_config/validate_value: loaded values are kept only when valid, and the file round-trips."""
+import math
+
+import pytest
+
+from config_store import default_config, merge_config, read_config, to_int, write_config_atomic
+
+def test_missing_or_odd_config_gives_defaults():
+    for loaded in (None, [], 'cps: 10', {}):
+        cfg = merge_config(loaded)
+        assert cfg == default_config
+        assert cfg is not default_config and cfg['left_click'] is not default_config['left_click']
+
+def test_valid_values_are_kept():
+    cfg = merge_config({
+        'left_click': {'mode': 'DELAY', 'cps': '40', 'delay': 25, 'bind': 'f6', 'click_type': 'double'},
+        'safety_key': 'shift',
+        'trigger': {'region': [10, 20, 30, 40], 'color': [0, 128, 255], 'tolerance': 0},
+        'control': {'port': 65535, 'socket': 'control.sock'},
+        'reload': {'enabled': False},
+    })
+    assert cfg['left_click']['mode'] == 'delay'
+    assert cfg['left_click']['cps'] == 40
+    assert cfg['left_click']['delay'] == 25
+    assert cfg['left_click']['bind'] == 'f6'
+    assert cfg['left_click']['click_type'] == 'double'
+    assert cfg['safety_key'] == 'shift'
+    assert cfg['trigger']['region'] == [10, 20, 30, 40]
+    assert cfg['trigger']['color'] == [0, 128, 255]
+    assert cfg['trigger']['tolerance'] == 0
+    assert cfg['control'] == {'port': 65535, 'socket': 'control.sock'}
+    assert cfg['reload']['enabled'] is False
+
+@pytest.mark.parametrize('section, key, value', [
+    ('left_click', 'cps', math.inf),
+    ('left_click', 'cps', 0),
+    ('left_click', 'cps', 'fast'),
+    ('left_click', 'cps', True),
+    ('left_click', 'delay', 86_400_001),
+    ('left_click', 'mode', 'turbo'),
+    ('control', 'port', 70000),
+    ('control', 'port', -1),
+    ('telemetry', 'http_port', 1e10),
+    ('trace', 'capacity', 1),
+    ('trigger', 'color', [256, 0, 0]),
+    ('trigger', 'color', [255, 0]),
+    ('trigger', 'region', [0, 0, -8, 8]),
+    ('trigger', 'region', 'everywhere'),
+    ('reload', 'enabled', 'yes'),
+    ('macro', 'file', ''),
+])
+def test_invalid_values_fall_back_to_the_default(section, key, value):
+    cfg = merge_config({section: {key: value}})
+    assert cfg[section][key] == default_config[section][key]
+
+def test_unknown_keys_and_bad_specs_are_dropped():
+    cfg = merge_config({
+        'nonsense': 1,
+        'left_click': {'turbo': True},
+        'safety_key': None,
+        'programs': {'mine': {'type': 'burst'}, 'broken': 'x'},
+        'routes': ['not', 'a', 'mapping'],
+    })
+    assert 'nonsense' not in cfg
+    assert 'turbo' not in cfg['left_click']
+    assert cfg['safety_key'] == default_config['safety_key']
+    assert cfg['programs'] == {'mine': {'type': 'burst'}}
+    assert cfg['routes'] == default_config['routes']
+
+@pytest.mark.parametrize('value, limits, expected', [
+    (5, (0, None), 5),
+    ('7', (0, 10), 7),
+    (2.9, (0, 10), 2),
+    (-1, (0, None), None),
+    (11, (0, 10), None),
+    (math.inf, (0, None), None),
+    (math.nan, (0, None), None),
+    (False, (0, None), None),
+    (None, (0, None), None),
+])
+def test_to_int(value, limits, expected):
+    assert to_int(value, limits) == expected
+
+def test_file_round_trip(tmp_path):
+    path = str(tmp_path / 'config.yaml')
+    cfg = merge_config({'left_click': {'cps': 33, 'bind': 'mouse4'}, 'routes': {'r': {'points': [[1, 2]]}}})
+    write_config_atomic(path, cfg)
+    assert read_config(path) == cfg
+    assert list(tmp_path.iterdir()) == [tmp_path / 'config.yaml']
+
+def test_unreadable_file_gives_none(tmp_path):
+    assert read_config(str(tmp_path / 'missing.yaml')) is None
+    path = tmp_path / 'list.yaml'
+    path.write_text('- 1\n- 2\n')
+    assert read_config(str(path)) is None
+    path.write_text('left_click: [unclosed\n')
+    assert read_config(str(path)) is None
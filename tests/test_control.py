@@ -0,0 +1,121 @@
+"""Control protocol: request lines, batches, bad input and the server over TCP."""
+import json
+import socket
+
+import pytest
+
+from control import MAX_LINE, ControlError, ControlProtocol, ControlServer, handle_line
+
+def make_commands():
+    calls = []
+    def start(channel):
+        calls.append(('start', channel))
+    def stats():
+        return {'stats': {'clicks': 3}}
+    def refuse():
+        raise ControlError("not now")
+    def crash():
+        return 1 / 0
+    return {'start': start, 'stats': stats, 'refuse': refuse, 'crash': crash}, calls
+
+def decode(line):
+    assert line.endswith(b'\n')
+    return json.loads(line)
+
+class Transport:
+    def __init__(self):
+        self.written = b''
+        self.closed = False
+
+    def get_extra_info(self, name):
+        return None
+
+    def write(self, data):
+        self.written += data
+
+    def close(self):
+        self.closed = True
+
+def test_single_command():
+    commands, calls = make_commands()
+    line, keep = handle_line(commands, b'{"cmd": "start", "channel": "left_click"}')
+    assert decode(line) == {'ok': True} and keep
+    assert calls == [('start', 'left_click')]
+    line, keep = handle_line(commands, b'{"cmd": "stats"}')
+    assert decode(line) == {'ok': True, 'stats': {'clicks': 3}} and keep
+
+def test_batch_answers_in_order():
+    commands, calls = make_commands()
+    line, keep = handle_line(commands, json.dumps([
+        {'cmd': 'start', 'channel': 'right_click'}, {'cmd': 'refuse'}, {'cmd': 'stats'}]))
+    assert keep
+    assert decode(line) == [{'ok': True}, {'ok': False, 'error': 'not now'}, {'ok': True, 'stats': {'clicks': 3}}]
+    assert calls == [('start', 'right_click')]
+
+@pytest.mark.parametrize('request_line', [
+    b'GET / HTTP/1.1',
+    b'{"cmd": "start"',
+    b'{"cmd": "explode"}',
+    b'{"channel": "left_click"}',
+    b'"start"',
+    b'[{"cmd": "start", "channel": "left_click"}, {"cmd": "explode"}]',
+])
+def test_bad_lines_close_without_running_anything(request_line):
+    commands, calls = make_commands()
+    line, keep = handle_line(commands, request_line)
+    assert decode(line)['ok'] is False
+    assert not keep
+    assert calls == []
+
+def test_handler_errors_become_replies():
+    commands, _ = make_commands()
+    line, keep = handle_line(commands, b'{"cmd": "crash"}')
+    assert keep
+    assert decode(line) == {'ok': False, 'error': "'crash' failed: ZeroDivisionError: division by zero"}
+    line, keep = handle_line(commands, b'{"cmd": "stats", "verbose": true}')
+    assert keep
+    assert decode(line)['ok'] is False and 'bad arguments' in decode(line)['error']
+
+def test_protocol_buffers_partial_lines():
+    commands, calls = make_commands()
+    protocol = ControlProtocol(commands)
+    transport = Transport()
+    protocol.connection_made(transport)
+    protocol.data_received(b'{"cmd": "sta')
+    assert transport.written == b''
+    protocol.data_received(b'rt", "channel": "left_click"}\n\n{"cmd": "stats"}\n{"cmd"')
+    assert [json.loads(line) for line in transport.written.splitlines()] == [
+        {'ok': True}, {'ok': True, 'stats': {'clicks': 3}}]
+    assert calls == [('start', 'left_click')] and not transport.closed
+
+def test_protocol_closes_on_a_bad_line_or_an_overlong_one():
+    commands, calls = make_commands()
+    protocol = ControlProtocol(commands)
+    transport = Transport()
+    protocol.connection_made(transport)
+    protocol.data_received(b'{"cmd": "stats"}\nPOST / HTTP/1.1\n{"cmd": "start", "channel": "left_click"}\n')
+    assert transport.closed
+    assert len(transport.written.splitlines()) == 2
+    assert calls == []
+
+    protocol = ControlProtocol(commands)
+    transport = Transport()
+    protocol.connection_made(transport)
+    protocol.data_received(b'x' * (MAX_LINE + 1))
+    assert transport.closed and transport.written == b''
+
+def test_server_round_trip():
+    commands, calls = make_commands()
+    server = ControlServer(commands, port=0)
+    try:
+        with socket.create_connection(server.address, timeout=5) as sock:
+            reader = sock.makefile('rb')
+            sock.sendall(b'{"cmd": "start", "channel": "left_click"}\n[{"cmd": "stats"}]\n')
+            assert json.loads(reader.readline()) == {'ok': True}
+            assert json.loads(reader.readline()) == [{'ok': True, 'stats': {'clicks': 3}}]
+            sock.sendall(b'GET / HTTP/1.1\r\n')
+            assert json.loads(reader.readline())['ok'] is False
+            assert reader.readline() == b''     # closed by the server
+    finally:
+        server.close()
+    assert calls == [('start', 'left_click')]
@@ -0,0 +1,71 @@
+"""Macro files: what MacroRecorder writes, MacroFile reads back and play() replays."""
+import threading
+
+import pytest
+
+from backends import EVENT_BUTTON_DOWN, EVENT_BUTTON_UP, EVENT_KEY_DOWN, EVENT_KEY_UP, EVENT_MOVE, EVENT_SCROLL, FakeBackend
+from macro import (BUTTON_DOWN, BUTTON_UP, CHUNK_EVENTS, KEY_DOWN, KEY_UP, MOVE, SCROLL,
+                   MacroFile, MacroRecorder, play)
+
+def record(path, events, moves=True):
+    rec = MacroRecorder(path, moves=moves)
+    for i, (kind, token, a, b) in enumerate(events):
+        rec.append(kind, token, a, b, t=rec.start_ns + i * 1000)
+    rec.stop()
+    return rec
+
+def read(path):
+    macro = MacroFile(path)
+    events = []
+    for n, t, a, b, code, kind in macro.blocks():
+        events.extend((t[i], kind[i], code[i], a[i], b[i]) for i in range(n))
+    tokens, moves = macro.tokens, macro.moves
+    del t, a, b, code, kind     # release the column views before unmapping
+    macro.close()
+    return events, tokens, moves
+
+def test_round_trip_across_blocks(tmp_path):
+    path = str(tmp_path / 'macro.bin')
+    events = [(MOVE, None, i, -i) for i in range(CHUNK_EVENTS + 10)]
+    events[5] = (KEY_DOWN, 'a', 0, 0)
+    events[CHUNK_EVENTS + 1] = (BUTTON_DOWN, 'left', 10, 20)
+    events[-1] = (SCROLL, None, 0, -3)
+    record(path, events, moves=False)
+    got, tokens, moves = read(path)
+    assert moves is False
+    assert len(got) == len(events)
+    assert [g[0] for g in got] == [i * 1000 for i in range(len(events))]
+    assert tokens == ['a', 'left']
+    assert got[5][1:3] == (KEY_DOWN, 0)
+    assert got[CHUNK_EVENTS + 1][1:] == (BUTTON_DOWN, 1, 10, 20)
+    assert got[-1][1:] == (SCROLL, 0, 0, -3)
+    assert [g[3:] for g in got[6:CHUNK_EVENTS]] == [(i, -i) for i in range(6, CHUNK_EVENTS)]
+
+def test_play_replays_every_event(tmp_path):
+    path = str(tmp_path / 'macro.bin')
+    record(path, [(KEY_DOWN, 'a', 0, 0), (KEY_UP, 'a', 0, 0), (MOVE, None, 5, 5),
+                  (BUTTON_DOWN, 'right', 5, 5), (BUTTON_UP, 'right', 5, 5), (SCROLL, None, 0, 1)])
+    backend = FakeBackend(capacity=64)
+    assert play(path, backend, threading.Event())
+    assert list(backend.event_kinds[:backend.events]) == [
+        EVENT_KEY_DOWN, EVENT_KEY_UP, EVENT_MOVE, EVENT_BUTTON_DOWN, EVENT_BUTTON_UP, EVENT_SCROLL]
+
+def test_cancelled_play_stops_early(tmp_path):
+    path = str(tmp_path / 'macro.bin')
+    record(path, [(KEY_DOWN, 'a', 0, 0)])
+    cancel = threading.Event()
+    cancel.set()
+    assert not play(path, FakeBackend(capacity=64), cancel)
+
+def test_unfinished_or_foreign_files_are_rejected(tmp_path):
+    path = str(tmp_path / 'macro.bin')
+    rec = MacroRecorder(path)
+    rec.append(KEY_DOWN, 'a')
+    rec._file.flush()
+    with pytest.raises(ValueError, match='incomplete'):
+        MacroFile(path)
+    rec.stop()
+    other = tmp_path / 'other.bin'
+    other.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError, match='not a macro'):
+        MacroFile(str(other))
@@ -0,0 +1,80 @@
+"""Rate programs: the intervals they generate, and a cursor reading them across prefetched chunks."""
+import math
+from array import array
+
+import pytest
+
+from config_store import default_config
+from programs import CHUNK, MAX_INTERVAL_NS, MIN_INTERVAL_NS, RateProgram
+
+def chunk(program, index):
+    out = array('q', bytes(8 * CHUNK))
+    n = program.generate(index, out)
+    return list(out[:n])
+
+def take(cursor, n):
+    return [cursor.next() for _ in range(n)]
+
+@pytest.mark.parametrize('name', list(default_config['programs']))
+def test_cursor_matches_direct_generation(name):
+    spec = dict(default_config['programs'][name], seed=7) if name == 'humanized' else default_config['programs'][name]
+    program = RateProgram(spec)
+    expected = chunk(program, 0) + chunk(program, 1) + chunk(program, 2)
+    assert take(program.cursor(), len(expected)) == expected
+
+def test_cursors_restart_from_the_beginning():
+    program = RateProgram({'type': 'burst', 'cps': 100, 'clicks': 3, 'rest_ms': 50})
+    first = take(program.cursor(), CHUNK + 10)
+    assert take(program.cursor(), CHUNK + 10) == first
+
+def test_burst_rests_after_every_group():
+    program = RateProgram({'type': 'burst', 'cps': 20, 'clicks': 3, 'rest_ms': 500})
+    assert take(program.cursor(), 7) == [50_000_000, 50_000_000, 500_000_000] * 2 + [50_000_000]
+    # The pattern carries on across chunk boundaries
+    assert chunk(program, 1)[:3] == take(program.cursor(), CHUNK + 3)[CHUNK:]
+
+def test_ramp_speeds_up_then_holds():
+    program = RateProgram({'type': 'ramp', 'start_cps': 10, 'end_cps': 100, 'duration': 2})
+    intervals = take(program.cursor(), program.ramp_clicks + 5)
+    ramp = intervals[:program.ramp_clicks]
+    assert all(a >= b for a, b in zip(ramp, ramp[1:]))
+    assert ramp[0] < 100_000_000 and ramp[-1] > 10_000_000
+    assert sum(ramp) == pytest.approx(2e9, rel=0.01)
+    assert intervals[program.ramp_clicks:] == [10_000_000] * 5
+
+def test_ramp_repeat_starts_over():
+    program = RateProgram({'type': 'ramp', 'start_cps': 1000, 'end_cps': 2000, 'duration': 5,
+                           'curve': 'exponential', 'then': 'repeat'})
+    assert chunk(program, program.ramp_chunks) == chunk(program, 0)
+
+@pytest.mark.parametrize('distribution', ['uniform', 'normal', 'lognormal', 'exponential'])
+def test_random_is_seeded_per_chunk(distribution):
+    spec = {'type': 'random', 'distribution': distribution, 'mean_ms': 10, 'spread_ms': 2, 'seed': 1234}
+    a, b = RateProgram(spec), RateProgram(spec)
+    assert chunk(a, 3) == chunk(b, 3)
+    assert chunk(a, 3) != chunk(a, 4)
+    values = chunk(a, 0)
+    assert sum(values) / len(values) == pytest.approx(10e6, rel=0.05)
+
+def test_random_is_clamped():
+    program = RateProgram({'type': 'random', 'distribution': 'normal', 'mean_ms': 1, 'spread_ms': 5, 'seed': 1})
+    values = chunk(program, 0)
+    assert min(values) == MIN_INTERVAL_NS and max(values) <= MAX_INTERVAL_NS
+
+@pytest.mark.parametrize('spec', [
+    {'type': 'burst', 'cps': 20, 'clicks': 0.5, 'rest_ms': 100},
+    {'type': 'burst', 'cps': 1e-12, 'clicks': 3, 'rest_ms': 100},
+    {'type': 'burst', 'cps': 20, 'clicks': 3, 'rest_ms': math.inf},
+    {'type': 'burst', 'cps': 20, 'clicks': 3},
+    {'type': 'ramp', 'start_cps': 0, 'end_cps': 10, 'duration': 1},
+    {'type': 'ramp', 'start_cps': 1, 'end_cps': 10, 'duration': 1, 'curve': 'cubic'},
+    {'type': 'ramp', 'start_cps': 1, 'end_cps': 10, 'duration': math.nan},
+    {'type': 'random', 'mean_ms': math.inf},
+    {'type': 'random', 'mean_ms': 10, 'spread_ms': -1},
+    {'type': 'random', 'mean_ms': 10, 'distribution': 'cauchy'},
+    {'type': 'sine'},
+    {},
+])
+def test_degenerate_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        RateProgram(spec)
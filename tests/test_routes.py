@@ -0,0 +1,60 @@
+"""Click routes: point parsing, visiting order and the column ranges."""
+import random
+
+import pytest
+
+from routes import COORD_LIMIT, MAX_CLICKS, ClickRoute, tour_length
+
+def scattered(n, seed=3):
+    rng = random.Random(seed)
+    return [[rng.randrange(0, 1920), rng.randrange(0, 1080)] for _ in range(n)]
+
+def test_points_take_the_route_defaults():
+    route = ClickRoute({'points': [[1, 2], [3, 4, 'RIGHT'], [5, 6, 'middle', 3], {'x': 7, 'y': 8}],
+                        'button': 'mouse4', 'clicks': 2})
+    assert list(route.xs) == [1, 3, 5, 7]
+    assert list(route.ys) == [2, 4, 6, 8]
+    assert route.buttons == ('mouse4', 'right', 'middle', 'mouse4')
+    assert list(route.counts) == [2, 2, 3, 2]
+
+def test_as_is_keeps_the_given_order():
+    points = scattered(20)
+    route = ClickRoute({'points': points})
+    assert [[x, y] for x, y in zip(route.xs, route.ys)] == points
+
+@pytest.mark.parametrize('order', ['nearest', '2opt'])
+def test_reordering_visits_every_point_on_a_shorter_tour(order):
+    points = scattered(60)
+    as_is = ClickRoute({'points': points})
+    route = ClickRoute({'points': points, 'order': order})
+    assert sorted(zip(route.xs, route.ys)) == sorted(map(tuple, points))
+    assert route.length < as_is.length
+    assert route.length == pytest.approx(tour_length(route.xs, route.ys, range(route.n)))
+
+def test_2opt_is_no_longer_than_nearest():
+    points = scattered(60, seed=11)
+    nearest = ClickRoute({'points': points, 'order': 'nearest'})
+    two_opt = ClickRoute({'points': points, 'order': '2opt'})
+    assert two_opt.length <= nearest.length
+
+def test_largest_values_fit_the_columns():
+    edge = COORD_LIMIT - 1
+    route = ClickRoute({'points': [[-COORD_LIMIT, edge, 'left', MAX_CLICKS]]})
+    assert (route.xs[0], route.ys[0], route.counts[0]) == (-COORD_LIMIT, edge, MAX_CLICKS)
+
+@pytest.mark.parametrize('spec', [
+    {'points': []},
+    {'points': 'here'},
+    {'points': [[1]]},
+    {'points': [[1, 2, 'left', 1, 'extra']]},
+    {'points': [['a', 2]]},
+    {'points': [[1, 2, 'thumb']]},
+    {'points': [[1, 2, 'left', 0]]},
+    {'points': [[1, 2, 'left', MAX_CLICKS + 1]]},
+    {'points': [[COORD_LIMIT, 0]]},
+    {'points': [[0, -COORD_LIMIT - 1]]},
+    {'points': [[1, 2]], 'order': 'random'},
+])
+def test_bad_routes_are_rejected(spec):
+    with pytest.raises(ValueError):
+        ClickRoute(spec)
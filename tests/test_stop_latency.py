@@ -0,0 +1,42 @@
+"""
+Stop, hold release, retune and the safety key must take effect within 1 ms
+at the 99th percentile (AUTOCLICKER_STOP_P99_MS), through the real hooks
+and engine on the fake backend with the default engine settings (batched
+mode on). The scenarios are the ones in benchmarks/stop_latency.py. A single
+run may be slower when the scheduler is late, up to AUTOCLICKER_STOP_MAX_MS
+(20 ms by default), which still catches a click that waited out the old
+interval.
+"""
+import os
+
+import pytest
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+RUNS = 100
+P99_BOUND_US = float(os.environ.get('AUTOCLICKER_STOP_P99_MS', '1')) * 1e3
+MAX_BOUND_US = float(os.environ.get('AUTOCLICKER_STOP_MAX_MS', '20')) * 1e3
+
+with pytest.MonkeyPatch.context() as mp:
+    mp.syspath_prepend(BENCH_DIR)   # only while importing: benchmarks/control.py shadows the app's
+    import _harness
+    import stop_latency
+
+@pytest.fixture(scope='module')
+def clicker(tmp_path_factory):
+    """A listening clicker on the fake backend, with the environment restored afterwards."""
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in _harness.fake_environment(str(tmp_path_factory.mktemp('config'))).items():
+            mp.setenv(name, value)
+        yield _harness.import_clicker(listen=True)
+
+@pytest.mark.parametrize('scenario', list(stop_latency.SCENARIOS))
+def test_takes_effect_within_bound(clicker, scenario):
+    latencies = []
+    for _ in range(RUNS):
+        latency, unexpected = stop_latency.SCENARIOS[scenario](clicker)
+        assert latency is not None, "no click where one was expected"
+        assert unexpected == 0
+        latencies.append(latency / 1e3)
+    report = _harness.summary(latencies)
+    assert report['p99_us'] <= P99_BOUND_US, report
+    assert report['max_us'] <= MAX_BOUND_US, report
@@ -0,0 +1,177 @@
+"""
+Pixel triggers: start or stop clicking when a watched screen region changes.
+
+A PixelTrigger thread grabs only its region from a pluggable frame source,
+skips frames that are byte-for-byte identical to the previous one, and
+otherwise compares the frame against a precomputed reference:
+
+    color   the region's mean colour is within 'tolerance' of 'color'
+    change  the region differs from how it looked when the trigger was armed
+    patch   the region matches a saved reference patch
+
+Frames are packed RGB bytes (width * height * 3). Comparisons are vectorized
+with NumPy when it is installed and fall back to plain loops otherwise.
+"""
+import importlib.util
+import sys
+import threading
+import time
+
+from optional_numpy import load as load_numpy
+
+MATCHES = ('color', 'change', 'patch')
+
+class FrameSource:
+    """Interface every frame source implements."""
+
+    def grab(self, region):
+        """Packed RGB bytes of the (x, y, width, height) screen 'region'."""
+        raise NotImplementedError
+
+class ScreenSource(FrameSource):
+    """Real screen capture through mss."""
+    requires = 'mss'
+
+    def __init__(self):
+        # Imported here so the synthetic source never needs mss (or a display)
+        import mss
+        self._mss = mss.mss()
+
+    def grab(self, region):
+        x, y, w, h = region
+        return self._mss.grab({'left': x, 'top': y, 'width': w, 'height': h}).rgb
+
+class SyntheticSource(FrameSource):
+    """
+    In-memory frames for tests and benchmarks; needs no display. Every grab
+    returns the current frame, which fill() or set_frame() replace; 'changed_ns'
+    is the perf_counter_ns() of the last replacement.
+    """
+
+    def __init__(self):
+        self._color = (0, 0, 0)
+        self._frame = None
+        self._cache = {}        # region size -> filled frame
+        self.changed_ns = 0
+
+    def fill(self, rgb):
+        """Make every pixel 'rgb'."""
+        self._color = tuple(rgb)
+        self._frame = None
+        self._cache = {}
+        self.changed_ns = time.perf_counter_ns()
+
+    def set_frame(self, frame):
+        self._frame = bytes(frame)
+        self.changed_ns = time.perf_counter_ns()
+
+    def grab(self, region):
+        if self._frame is not None:
+            return self._frame
+        size = region[2] * region[3]
+        frame = self._cache.get(size)
+        if frame is None:
+            frame = self._cache[size] = bytes(self._color) * size
+        return frame
+
+SOURCES = {
+    'screen': ScreenSource,
+    'synthetic': SyntheticSource,
+}
+
+def missing_module(name):
+    """The module source 'name' needs but that is not installed, or None."""
+    module = getattr(SOURCES.get(name), 'requires', None)
+    if module is not None and importlib.util.find_spec(module) is None:
+        return module
+    return None
+
+def create_source(name='screen'):
+    try:
+        return SOURCES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown frame source {name!r} (choose from {', '.join(SOURCES)})")
+
+def mean_color(frame):
+    np = load_numpy()
+    if np is not None:
+        return np.frombuffer(frame, dtype=np.uint8).reshape(-1, 3).mean(axis=0)
+    n = len(frame) // 3
+    return [sum(frame[c::3]) / n for c in range(3)]
+
+class FrameMatcher:
+    """Decides whether a frame matches; the reference is prepared once, up front."""
+
+    def __init__(self, match, tolerance, color=None, reference=None):
+        np = load_numpy()
+        if match not in MATCHES:
+            raise ValueError(f"'match' must be one of {', '.join(MATCHES)}")
+        self.match = match
+        self.tolerance = tolerance
+        if match == 'color':
+            self.color = np.array(color, dtype=np.float64) if np is not None else list(color)
+        else:
+            if reference is None:
+                raise ValueError(f"'{match}' needs a reference frame")
+            self.reference = np.frombuffer(reference, dtype=np.uint8).astype(np.int16) if np is not None else reference
+
+    def __call__(self, frame):
+        np = load_numpy()
+        if self.match == 'color':
+            mean = mean_color(frame)
+            if np is not None:
+                return bool(np.abs(mean - self.color).max() <= self.tolerance)
+            return max(abs(m - c) for m, c in zip(mean, self.color)) <= self.tolerance
+        ref = self.reference
+        if len(frame) != len(ref):
+            return self.match == 'change'
+        if np is not None:
+            diff = np.abs(np.frombuffer(frame, dtype=np.uint8) - ref).mean()
+        else:
+            diff = sum(abs(a - b) for a, b in zip(frame, ref)) / len(ref)
+        same = diff <= self.tolerance
+        return not same if self.match == 'change' else same
+
+class PixelTrigger:
+    """
+    Polls 'region' every 'poll_s' seconds and calls on_match() when the
+    region starts matching and on_unmatch() when it stops.
+    """
+
+    def __init__(self, source, region, matcher, on_match, on_unmatch, poll_s):
+        self.source = source
+        self.region = tuple(region)
+        self.matcher = matcher
+        self.on_match = on_match
+        self.on_unmatch = on_unmatch
+        self.poll_s = poll_s
+        self.matched = False
+        self.frames = 0         # frames grabbed
+        self.compared = 0       # frames that differed from the previous one
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pixel-trigger", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        grab = self.source.grab
+        region = self.region
+        last = None
+        while not self._cancel.is_set():
+            try:
+                frame = grab(region)
+            except Exception as e:
+                sys.stderr.write(f"Pixel trigger stopped: could not grab the screen: {e}\n")
+                return
+            self.frames += 1
+            if frame != last:
+                last = frame
+                self.compared += 1
+                matched = self.matcher(frame)
+                if matched != self.matched:
+                    self.matched = matched
+                    (self.on_match if matched else self.on_unmatch)()
+            self._cancel.wait(self.poll_s)
+
+    def stop(self):
+        self._cancel.set()
+        self._thread.join()
@@ -0,0 +1,34 @@
+"""
+Coalesced UI updates.
+
+The input hooks, the engine and the macro threads must never touch Tk
+widgets or wait for a redraw. They only post a topic here; the Tk thread
+drains the queue from a root.after() pump and redraws each posted topic once
+per frame, however many times it was posted in between.
+"""
+import threading
+
+# Topics
+STATE = 'state'                    # bind labels, toggle/record/play buttons
+LISTENING_DONE = 'listening_done'  # close the "Listening..." popup
+STATS = 'stats'                    # live stats readout
+CONFIG = 'config'                  # config reloaded from disk: reread every setting
+
+class UpdateQueue:
+    """A set of pending topics; posting is O(1) and never blocks on the UI."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # insertion-ordered set of topics
+
+    def post(self, topic):
+        with self._lock:
+            self._pending[topic] = None
+
+    def drain(self):
+        """Return (and forget) every topic posted since the last drain, in order."""
+        with self._lock:
+            if not self._pending:
+                return ()
+            pending, self._pending = self._pending, {}
+        return tuple(pending)